@@ -9,4 +9,13 @@ LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "gpt-4o-mini")
 LLM_API_KEY = os.getenv("LLM_API_KEY")
 LLM_API_URL = os.getenv("LLM_API_URL")
 LLM_REASONING = os.getenv("LLM_REASONING", "false").lower() == "true"
-
+# seconds a /graph request may take; keep below the frontend's 300 s timeout
+GRAPH_DEADLINE = float(os.getenv("GRAPH_DEADLINE", "270"))
+# nodes whose temperature-0 structured LLM answers are cached in Redis
+LLM_CACHE_NODES = [
+    node.strip()
+    for node in os.getenv("LLM_CACHE_NODES", "critic,calories,schema_generation").split(",")
+    if node.strip()
+]
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 86400)))
+CACHE_WARMUP = os.getenv("CACHE_WARMUP", "true").lower() == "true"
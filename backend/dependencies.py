@@ -1,3 +1,5 @@
+import asyncio
+
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from psycopg import AsyncConnection
 from psycopg_pool import AsyncConnectionPool
@@ -6,6 +8,9 @@ from redis.asyncio import Redis
 
 from src.api_handler.recipes_client import RecipesAPIClient
 from src.api_handler.nutrition_client import NutritionAPIClient
+from src.api_handler.catalog import RecipeCatalog
+from src.api_handler.nutrition_db import NutritionDatabase
+from src.agent.llm_registry import LLMRegistry
 from langgraph.graph.state import CompiledStateGraph
 
 
@@ -16,6 +21,10 @@ class AppState:
     recipes_client: RecipesAPIClient | None = None
     nutrition_client: NutritionAPIClient | None = None
     redis: Redis | None = None
+    catalog: RecipeCatalog | None = None
+    nutrition_db: NutritionDatabase | None = None
+    warmup_task: asyncio.Task | None = None
+    llm_registry: LLMRegistry | None = None
 
 
 app_state = AppState()
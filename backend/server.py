@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 import uvicorn
 from fastapi import FastAPI, Header, HTTPException
@@ -11,7 +12,7 @@ from openinference.instrumentation.langchain import LangChainInstrumentor
 
 from redis.asyncio import Redis
 
-from backend.config import POSTGRES_URI, REDIS_URL
+from backend.config import POSTGRES_URI, REDIS_URL, CACHE_WARMUP
 from backend.schemas import GraphRequest, GraphResponse, LoginRequest, LoginResponse
 from backend.dependencies import app_state
 from backend.services import (
@@ -21,9 +22,16 @@ from backend.services import (
     extract_response_message,
 )
 from src.agent.graph import build_graph
+from src.agent.llm_registry import LLMRegistry
 from src.database.crud import init_db, get_session, get_user_by_login, get_profile_by_user_id, update_profile
 from src.api_handler.recipes_client import RecipesAPIClient
 from src.api_handler.nutrition_client import NutritionAPIClient
+from src.api_handler.catalog import RecipeCatalog
+from src.api_handler.nutrition_db import NutritionDatabase
+from src.api_handler.constants import NUTRITION_HTTP_FALLBACK
+from src.api_handler.warmup import warm_up_from_history
+from src.api_handler.transport import close_transport
+from src.api_handler.vocabulary import ensure_vocabulary
 
 tracer_provider = register(project_name="aboba", auto_instrument=False)
 LangChainInstrumentor().instrument(tracer_provider=tracer_provider)
@@ -38,12 +46,36 @@ async def lifespan(app: FastAPI):
     await app_state.checkpointer.setup()
     app_state.graph = build_graph(checkpointer=app_state.checkpointer)
     app_state.redis = Redis.from_url(REDIS_URL)
-    app_state.recipes_client = RecipesAPIClient(redis=app_state.redis)
-    app_state.nutrition_client = NutritionAPIClient(redis=app_state.redis)
+    app_state.llm_registry = LLMRegistry()
+    app_state.catalog = RecipeCatalog()
+    # without a vocabulary plural MealDB spellings never match; build it on a fresh deploy
+    await ensure_vocabulary(await asyncio.to_thread(app_state.catalog.ingredient_names))
+    # tokenized with the vocabulary above, before any request scores catalog recipes
+    await asyncio.to_thread(app_state.catalog.load_index)
+    app_state.recipes_client = RecipesAPIClient(redis=app_state.redis, catalog=app_state.catalog)
+    # opening may reindex the table after a tokenizer change
+    app_state.nutrition_db = await asyncio.to_thread(NutritionDatabase)
+    app_state.nutrition_client = NutritionAPIClient(
+        redis=app_state.redis,
+        nutrition_db=app_state.nutrition_db,
+        http_fallback=NUTRITION_HTTP_FALLBACK,
+    )
+    if CACHE_WARMUP:
+        app_state.warmup_task = asyncio.create_task(
+            warm_up_from_history(app_state.redis, app_state.catalog)
+        )
     yield
+    if app_state.warmup_task:
+        app_state.warmup_task.cancel()
+        # let it close its own client before the shared transport goes away
+        await asyncio.gather(app_state.warmup_task, return_exceptions=True)
     await app_state.redis.close()
     await app_state.recipes_client.close()
     await app_state.nutrition_client.close()
+    app_state.catalog.close()
+    app_state.nutrition_db.close()
+    await close_transport()
+    await app_state.llm_registry.aclose()
     await app_state.pool.close()
 
 
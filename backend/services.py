@@ -3,10 +3,12 @@ from langgraph.types import Command
 from langchain_core.runnables.config import RunnableConfig
 from fastapi import HTTPException
 
-from backend.config import LLM_MODEL_NAME, LLM_API_KEY, LLM_API_URL, LLM_REASONING
+from backend.config import (LLM_MODEL_NAME, LLM_API_KEY, LLM_API_URL, LLM_REASONING, GRAPH_DEADLINE,
+                            LLM_CACHE_NODES, LLM_CACHE_TTL)
 from backend.dependencies import app_state
 from src.agent.schemas.objects import UserProfile
 from src.agent.states import AgentState
+from src.api_handler.deadline import Deadline
 
 
 def build_graph_config(thread_id: str) -> RunnableConfig:
@@ -20,6 +22,10 @@ def build_graph_config(thread_id: str) -> RunnableConfig:
             "recipes_client": app_state.recipes_client,
             "nutrition_client": app_state.nutrition_client,
             "redis": app_state.redis,
+            "llm_registry": app_state.llm_registry,
+            "llm_cache_nodes": LLM_CACHE_NODES,
+            "llm_cache_ttl": LLM_CACHE_TTL,
+            "deadline": Deadline(GRAPH_DEADLINE),
         }
     }
 
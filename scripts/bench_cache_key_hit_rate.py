@@ -0,0 +1,67 @@
+"""Replay a log of search tool calls and compare cache hit rates with and without canonical keys.
+
+Each line of the log is a JSON object with the search tool arguments (`query`,
+`ingredient_include`, `ingredient_exclude`, `area`); the hit rate is the share of lookups whose
+key was already produced by an earlier line, i.e. the best case with no expiry.
+
+    python -m scripts.bench_cache_key_hit_rate requests.jsonl
+"""
+import argparse
+import json
+from collections import Counter
+
+from src.api_handler.cache import make_cache_key
+from src.api_handler.vocabulary import get_vocabulary, canonical_area, canonical_query
+
+
+def read_calls(path: str) -> list[dict]:
+    calls = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                calls.append(json.loads(line))
+    return calls
+
+
+def lookups(call: dict, canonical: bool) -> list[str]:
+    vocabulary = get_vocabulary()
+    keys = []
+    query = call.get("query") or call.get("query_text")
+    if query:
+        keys.append(make_cache_key("recipes:name", canonical_query(query) if canonical else query))
+    area = call.get("area")
+    if area:
+        keys.append(make_cache_key("recipes:area_ids", canonical_area(area) if canonical else area))
+    include = call.get("ingredient_include") or call.get("include_ingredients") or []
+    if canonical:
+        include = vocabulary.canonical_list(include)
+    keys += [make_cache_key("recipes:ingredient_ids", ing) for ing in include]
+    return keys
+
+
+def hit_rate(calls: list[dict], canonical: bool) -> tuple[int, int, float]:
+    seen: Counter[str] = Counter()
+    total = hits = 0
+    for call in calls:
+        for key in lookups(call, canonical):
+            total += 1
+            hits += seen[key] > 0
+            seen[key] += 1
+    return total, len(seen), hits / total if total else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    calls = read_calls(args.path)
+    print(f"{len(calls)} search calls, vocabulary of {len(get_vocabulary())} ingredients")
+    for label, canonical in (("raw keys", False), ("canonical keys", True)):
+        total, distinct, rate = hit_rate(calls, canonical)
+        print(f"  {label:15} {total:>6} lookups  {distinct:>6} distinct keys  {rate:6.1%} hit rate")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Compare cache serializers on recipe payloads: bytes stored and decode time per hit.
+
+Uses the local catalog when it has been ingested, synthetic MealDB-sized recipes otherwise.
+
+    python -m scripts.bench_cache_serialization
+"""
+import random
+import string
+import timeit
+
+from src.api_handler.catalog import RecipeCatalog
+from src.api_handler.serialization import JsonSerializer, CompactSerializer
+
+
+def synthetic_recipe(i: int) -> dict:
+    words = ["".join(random.choices(string.ascii_lowercase, k=random.randint(3, 9)))
+             for _ in range(250)]
+    return {
+        "id": str(52700 + i),
+        "title": f"Recipe {i}",
+        "ingredients": [
+            {"name": f"Ingredient {j}", "amount": "2 tbsp", "calories_per100g": None}
+            for j in range(12)
+        ],
+        "instructions": " ".join(words),
+        "total_calories": None,
+    }
+
+
+def load_recipes(n: int) -> list[dict]:
+    catalog = RecipeCatalog()
+    try:
+        if len(catalog):
+            return catalog.search_by_ingredient("salt")[:n] or catalog.search_by_area("british")[:n]
+    finally:
+        catalog.close()
+    return [synthetic_recipe(i) for i in range(n)]
+
+
+def bench(name: str, payload, number: int = 200):
+    print(f"\n{name}")
+    for serializer in (JsonSerializer(), CompactSerializer()):
+        raw = serializer.dumps(payload)
+        seconds = timeit.timeit(lambda: serializer.loads(raw), number=number) / number
+        print(f"  {type(serializer).__name__:18} {len(raw):>9} bytes  {seconds * 1e6:>9.1f} us/hit")
+
+
+def main():
+    recipes = load_recipes(50)
+    bench("single recipe record (recipes:lookup)", recipes[0])
+    bench(f"full result list, {len(recipes)} recipes (pre-normalization layout)", recipes)
+    bench(f"ID list, {len(recipes)} IDs (recipes:ingredient)", [r["id"] for r in recipes])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Measure what compiling the recipe retrieval subgraph per request cost.
+
+Times `build_recipe_retrieval_graph()` (StateGraph, ToolNode and compile), which
+`recipe_retrieval_node` used to run on every request and `build_graph` now runs once at
+startup, next to the one-off cost of `build_graph()` itself.
+
+    python -m scripts.bench_subgraph_compile --runs 50
+"""
+import argparse
+import timeit
+
+from src.agent.graph import build_graph
+from src.agent.recipe_retrieval_agent import build_recipe_retrieval_graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    build_recipe_retrieval_graph()  # imports and first-use caches out of the measurement
+    subgraph_ms = timeit.timeit(build_recipe_retrieval_graph, number=args.runs) / args.runs * 1000
+    graph_runs = max(1, args.runs // 10)
+    graph_ms = timeit.timeit(build_graph, number=graph_runs) / graph_runs * 1000
+
+    print(f"build_graph, once per process:                 {graph_ms:8.2f} ms")
+    print(f"subgraph build+compile, saved on every request: {subgraph_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import math
+from typing import Callable, Sequence, TypeVar
+
+from src.agent.constants import (BATCH_CHARS_PER_TOKEN, BATCH_INPUT_TOKENS,
+                                 BATCH_MAX_ITEMS, BATCH_REASONING_RESERVE)
+
+T = TypeVar("T")
+
+
+def estimate_tokens(text: str) -> int:
+    # chars-per-token heuristic on the rendered prompt; the served models use different
+    # tokenizers, and a slight overestimate only makes batches a little smaller
+    return math.ceil(len(text) / BATCH_CHARS_PER_TOKEN)
+
+
+def output_budget(max_tokens: int, reasoning: bool) -> int:
+    """Tokens left for the answer itself under `max_tokens`; reasoning tokens count too."""
+    return max_tokens - BATCH_REASONING_RESERVE if reasoning else max_tokens
+
+
+def pack_batches(
+    items: Sequence[T],
+    render: Callable[[T], str],
+    fixed_text: str,
+    output_per_item: int,
+    output_fixed: int,
+    max_output_tokens: int,
+    max_input_tokens: int = BATCH_INPUT_TOKENS,
+    max_items: int | None = BATCH_MAX_ITEMS,
+) -> list[list[T]]:
+    """Split `items` into consecutive batches whose prompts fit the token budgets.
+
+    A batch's input is `fixed_text` (system prompt, query, framing) plus `render(item)` for
+    each item; its output is `output_fixed` plus `output_per_item` per item. An item too
+    large for any batch still gets a batch of its own.
+    """
+    fixed_tokens = estimate_tokens(fixed_text)
+    batches: list[list[T]] = []
+    batch: list[T] = []
+    input_tokens = fixed_tokens
+    for item in items:
+        item_tokens = estimate_tokens(render(item)) + 1  # separator
+        output_tokens = output_fixed + output_per_item * (len(batch) + 1)
+        if batch and (
+            input_tokens + item_tokens > max_input_tokens
+            or output_tokens > max_output_tokens
+            or (max_items is not None and len(batch) >= max_items)
+        ):
+            batches.append(batch)
+            batch, input_tokens = [], fixed_tokens
+        batch.append(item)
+        input_tokens += item_tokens
+    if batch:
+        batches.append(batch)
+    return batches
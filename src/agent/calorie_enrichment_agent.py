@@ -3,10 +3,20 @@ from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables.config import RunnableConfig
 from redis.asyncio import Redis
 from .states import RecipeSearchSubgraphState
-from .utils import create_llm, batch_execute, StructuredRetryRunnable
-from .prompts import get_calories_estimation_system_prompt, format_calories_estimation_prompt
+from .utils import create_llm, StructuredRetryRunnable
+from .llm_cache import with_llm_cache
+from .executor import adaptive_execute, get_limiter
+from .batching import pack_batches, output_budget
+from .prompts import (get_calories_estimation_system_prompt, format_calories_recipe,
+                      format_calories_estimation_prompt)
 from src.api_handler.nutrition_funcs import enrich_recipes_with_nutrition
+from src.api_handler.calories import estimate_recipe_calories
+from src.agent.constants import (CALORIE_COVERAGE_THRESHOLD, BATCH_INPUT_TOKENS,
+                                 BATCH_MAX_ITEMS, CALORIES_OUTPUT_TOKENS_PER_RECIPE,
+                                 CALORIES_OUTPUT_TOKENS_FIXED)
+from src.api_handler.deadline import deadline_from_config, use_deadline
 from src.api_handler.datamodels import CaloriesResponse, Recipe
+from src.api_handler.cache import cache_get_many, cache_set_many
 
 CALORIES_CACHE_TTL = 86400
 CALORIES_CACHE_PREFIX = "calories:recipe"
@@ -15,19 +25,31 @@ CALORIES_CACHE_PREFIX = "calories:recipe"
 async def get_cached_calories(redis: Redis | None, recipe_ids: list[str]) -> dict[str, int]:
     if not redis or not recipe_ids:
         return {}
-    cached = {}
-    for recipe_id in recipe_ids:
-        val = await redis.get(f"{CALORIES_CACHE_PREFIX}:{recipe_id}")
-        if val:
-            cached[recipe_id] = int(val)
-    return cached
+    values = await cache_get_many(redis, [f"{CALORIES_CACHE_PREFIX}:{i}" for i in recipe_ids])
+    return {
+        recipe_id: int(val)
+        for recipe_id, val in zip(recipe_ids, values)
+        if val is not None
+    }
 
 
 async def cache_calories(redis: Redis | None, id_to_calories: dict[str, int]) -> None:
-    if not redis:
-        return
-    for recipe_id, calories in id_to_calories.items():
-        await redis.set(f"{CALORIES_CACHE_PREFIX}:{recipe_id}", calories, ex=CALORIES_CACHE_TTL)
+    await cache_set_many(
+        redis,
+        {f"{CALORIES_CACHE_PREFIX}:{i}": cals for i, cals in id_to_calories.items()},
+        ttl=CALORIES_CACHE_TTL,
+    )
+
+
+def calories_recipe_data(recipe: Recipe) -> dict:
+    ingredients = []
+    for ing in recipe.ingredients:
+        ingredients.append({
+            "name": ing.name,
+            "amount": ing.amount or "unknown amount",
+            "calories": ing.calories_per100g if ing.calories_per100g is not None else "unknown calories"
+        })
+    return {"id": recipe.id, "title": recipe.title, "ingredients": ingredients}
 
 
 async def enrich_and_estimate_calories_node(state: RecipeSearchSubgraphState, config: Optional[RunnableConfig] = None) -> dict:
@@ -40,6 +62,7 @@ async def enrich_and_estimate_calories_node(state: RecipeSearchSubgraphState, co
     if not nutrition_client:
         raise ValueError("nutrition_client not found in config")
     redis: Redis | None = configurable.get("redis")
+    deadline = deadline_from_config(config)
 
     recipe_ids = [r.id for r in recipes]
     cached_calories = await get_cached_calories(redis, recipe_ids)
@@ -47,10 +70,31 @@ async def enrich_and_estimate_calories_node(state: RecipeSearchSubgraphState, co
     recipes_to_process = [r for r in recipes if r.id not in cached_calories]
 
     id_to_calories: dict[str, int] = dict(cached_calories)
+    new_calories: dict[str, int] = {}
+    llm_recipes: list[Recipe] = []
 
     if recipes_to_process:
-        enriched_recipes = await enrich_recipes_with_nutrition(recipes_to_process, nutrition_client)
-
+        with use_deadline(deadline):
+            enriched_recipes = await enrich_recipes_with_nutrition(recipes_to_process, nutrition_client)
+
+        # totals from parsed measures and per-100g values; only recipes with too many
+        # unresolved ingredients are left to the LLM
+        threshold = configurable.get("calorie_coverage_threshold", CALORIE_COVERAGE_THRESHOLD)
+        for recipe in enriched_recipes:
+            total, coverage = estimate_recipe_calories(recipe)
+            if coverage >= threshold:
+                new_calories[recipe.id] = round(total)
+            else:
+                llm_recipes.append(recipe)
+        print(f"Calories computed for {len(new_calories)} recipes, "
+              f"{len(llm_recipes)} left for the LLM")
+        id_to_calories.update(new_calories)
+
+    if llm_recipes and deadline is not None and deadline.expired():
+        print(f"Deadline reached, {len(llm_recipes)} recipes left without calories")
+        llm_recipes = []
+
+    if llm_recipes:
         llm = create_llm(
             reasoning=configurable.get("reasoning", True),
             model=configurable.get("model_name"),
@@ -58,44 +102,54 @@ async def enrich_and_estimate_calories_node(state: RecipeSearchSubgraphState, co
             api_key=configurable.get("llm_api_key"),
             base_url=configurable.get("llm_api_url"),
             max_tokens=4096,
-        ).with_structured_output(CaloriesResponse)
-        retry_runnable = StructuredRetryRunnable(llm, CaloriesResponse)
+            deadline=deadline,
+            schema=CaloriesResponse,
+            registry=configurable.get("llm_registry"),
+        )
+        retry_runnable = with_llm_cache(
+            StructuredRetryRunnable(llm, CaloriesResponse, deadline=deadline),
+            "calories",
+            configurable,
+            temperature=0,
+            model=configurable.get("model_name"),
+            base_url=configurable.get("llm_api_url"),
+            reasoning=configurable.get("reasoning", True),
+            max_tokens=4096,
+        )
 
-        batch_size = configurable.get("batch_size", 5)
+        system_prompt = get_calories_estimation_system_prompt()
         max_concurrent = configurable.get("max_parallel_tasks", 2)
-        batches = [
-            enriched_recipes[i:i + batch_size] for i
-            in range(0, len(enriched_recipes), batch_size)
-        ]
-
-        async def process_batch(batch: list[Recipe]):
-            recipes_data = []
-            for recipe in batch:
-                ingredients = []
-                for ing in recipe.ingredients:
-                    ingredients.append({
-                        "name": ing.name,
-                        "amount": ing.amount or "unknown amount",
-                        "calories": ing.calories_per100g if ing.calories_per100g is not None else "unknown calories"
-                    })
-                recipes_data.append({"id": recipe.id, "title": recipe.title, "ingredients": ingredients})
-
+        # batches sized by the rendered prompt, so long ingredient lists cannot overflow a call
+        batches = pack_batches(
+            [calories_recipe_data(recipe) for recipe in llm_recipes],
+            format_calories_recipe,
+            system_prompt + format_calories_estimation_prompt([]),
+            output_per_item=CALORIES_OUTPUT_TOKENS_PER_RECIPE,
+            output_fixed=CALORIES_OUTPUT_TOKENS_FIXED,
+            max_output_tokens=output_budget(4096, configurable.get("reasoning", True)),
+            max_input_tokens=configurable.get("batch_input_tokens", BATCH_INPUT_TOKENS),
+            max_items=configurable.get("batch_size", BATCH_MAX_ITEMS),
+        )
+
+        async def process_batch(recipes_data: list[dict]):
             messages = [
-                SystemMessage(content=get_calories_estimation_system_prompt()),
+                SystemMessage(content=system_prompt),
                 HumanMessage(content=format_calories_estimation_prompt(recipes_data))
             ]
             return await retry_runnable.ainvoke(messages)
 
         tasks = [process_batch(batch) for batch in batches]
-        batched_results: list[CaloriesResponse] = await batch_execute(tasks, max_concurrent)
+        batched_results: list[CaloriesResponse]
+        batched_results, _ = await adaptive_execute(
+            tasks, get_limiter(configurable.get("llm_api_url"), max_concurrent), deadline
+        )
 
-        new_calories = {}
         for result in batched_results:
             for item in result.root:
                 new_calories[item.id] = item.total_calories
                 id_to_calories[item.id] = item.total_calories
 
-        await cache_calories(redis, new_calories)
+    await cache_calories(redis, new_calories)
 
     updated_recipes = []
     for recipe in recipes:
@@ -8,11 +8,14 @@ from .schemas.structured_output import ClarificationDecision, UserRecipeQuery
 from .schemas.objects import UserProfile
 from .prompts import get_clarification_prompt, get_schema_generation_prompt
 from .utils import create_llm, StructuredRetryRunnable
+from .llm_cache import with_llm_cache
+from src.api_handler.deadline import deadline_from_config
 
 
 async def clarification_node(state: AgentState, config: Optional[RunnableConfig] = None) -> Command:
     configurable = config.get("configurable", {}) if config else {}
     reasoning = configurable.get("reasoning", False)
+    deadline = deadline_from_config(config)
     llm = create_llm(
         reasoning=reasoning,
         model=configurable.get("model_name"),
@@ -20,9 +23,12 @@ async def clarification_node(state: AgentState, config: Optional[RunnableConfig]
         api_key=configurable.get("llm_api_key"),
         base_url=configurable.get("llm_api_url"),
         max_tokens=4096,
-    ).with_structured_output(ClarificationDecision)
+        deadline=deadline,
+        schema=ClarificationDecision,
+        registry=configurable.get("llm_registry"),
+    )
     
-    retry_runnable = StructuredRetryRunnable(llm, ClarificationDecision)
+    retry_runnable = StructuredRetryRunnable(llm, ClarificationDecision, deadline=deadline)
     
     user_info = []
     if state.user_profile.preferences:
@@ -64,6 +70,7 @@ async def asking_question_node(state: AgentState, config: Optional[RunnableConfi
 async def schema_generation_node(state: AgentState, config: Optional[RunnableConfig] = None) -> dict:
     configurable = config.get("configurable", {}) if config else {}
     reasoning = configurable.get("reasoning", False)
+    deadline = deadline_from_config(config)
     llm = create_llm(
         reasoning=reasoning,
         model=configurable.get("model_name"),
@@ -71,9 +78,21 @@ async def schema_generation_node(state: AgentState, config: Optional[RunnableCon
         api_key=configurable.get("llm_api_key"),
         base_url=configurable.get("llm_api_url"),
         max_tokens=4096,
-    ).with_structured_output(UserRecipeQuery)
+        deadline=deadline,
+        schema=UserRecipeQuery,
+        registry=configurable.get("llm_registry"),
+    )
     
-    retry_runnable = StructuredRetryRunnable(llm, UserRecipeQuery)
+    retry_runnable = with_llm_cache(
+        StructuredRetryRunnable(llm, UserRecipeQuery, deadline=deadline),
+        "schema_generation",
+        configurable,
+        temperature=0,
+        model=configurable.get("model_name"),
+        base_url=configurable.get("llm_api_url"),
+        reasoning=reasoning,
+        max_tokens=4096,
+    )
     
     conversation_history = get_buffer_string(state.messages)
     
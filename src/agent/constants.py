@@ -0,0 +1,22 @@
+LLM_MAX_CONNECTIONS = 50
+LLM_MAX_KEEPALIVE_CONNECTIONS = 20
+LLM_KEEPALIVE_EXPIRY = 60.0
+LLM_CACHE_TTL = 7 * 86400
+LLM_MAX_CONCURRENCY = 8
+LLM_LATENCY_FACTOR = 2.0
+LLM_DECREASE_COOLDOWN = 5.0
+LLM_RATE_LIMIT_BACKOFF = 2.0
+BATCH_CHARS_PER_TOKEN = 3.5
+BATCH_INPUT_TOKENS = 3000
+BATCH_MAX_ITEMS = 20
+BATCH_REASONING_RESERVE = 2048
+CRITIC_OUTPUT_TOKENS_PER_RECIPE = 12
+CRITIC_OUTPUT_TOKENS_FIXED = 200
+CALORIES_OUTPUT_TOKENS_PER_RECIPE = 20
+CALORIES_OUTPUT_TOKENS_FIXED = 20
+CALORIE_COVERAGE_THRESHOLD = 0.8
+QUERY_CACHE_THRESHOLD = 0.8
+QUERY_CACHE_MAX_ENTRIES = 2000
+QUERY_CACHE_TTL = 86400
+QUERY_CACHE_PERMUTATIONS = 32
+QUERY_CACHE_BANDS = 16
@@ -3,13 +3,50 @@ from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables.config import RunnableConfig
 from langgraph.graph import END
 from .states import RecipeSearchSubgraphState
-from .utils import create_llm, StructuredRetryRunnable, batch_execute
+from .utils import create_llm, StructuredRetryRunnable
+from .llm_cache import with_llm_cache
+from .executor import adaptive_execute, get_limiter
 from .schemas.structured_output import RecipeSelection
-from .prompts import format_recipe_query, get_critic_prompt, format_critic_user_message, get_critic_negative_reason_summary
+from .schemas.objects import RecipeVerdict
+from .batching import pack_batches, output_budget
+from .prompts import (format_recipe_query, get_critic_prompt, format_critic_recipe,
+                      format_critic_user_message, get_critic_negative_reason_summary)
+from src.agent.constants import (BATCH_INPUT_TOKENS, BATCH_MAX_ITEMS,
+                                 CRITIC_OUTPUT_TOKENS_PER_RECIPE, CRITIC_OUTPUT_TOKENS_FIXED)
+from src.api_handler.deadline import deadline_from_config
+from src.api_handler.datamodels import Recipe
+
+# time one more search -> enrich -> critic round is expected to take
+ITERATION_RESERVE = 60.0
+
+
+def plan_critic_batches(
+    recipes: list[Recipe], query_text: str, configurable: dict
+) -> list[list[Recipe]]:
+    # batches sized by the rendered prompt, so long ingredient lists cannot overflow a call
+    return pack_batches(
+        recipes,
+        format_critic_recipe,
+        get_critic_prompt() + format_critic_user_message(query_text, ""),
+        output_per_item=CRITIC_OUTPUT_TOKENS_PER_RECIPE,
+        output_fixed=CRITIC_OUTPUT_TOKENS_FIXED,
+        max_output_tokens=output_budget(4096, configurable.get("reasoning", True)),
+        max_input_tokens=configurable.get("batch_input_tokens", BATCH_INPUT_TOKENS),
+        max_items=configurable.get("batch_size", BATCH_MAX_ITEMS),
+    )
 
 
 async def critic_agent_node(state: RecipeSearchSubgraphState, config: Optional[RunnableConfig] = None) -> dict:
     configurable = config.get("configurable", {}) if config else {}
+    deadline = deadline_from_config(config)
+    if deadline is not None and deadline.expired():
+        return {"partial": True, "messages": HumanMessage(content="Search time budget exhausted")}
+    if not state.current_recipes:
+        # every recipe found was judged in an earlier iteration (or none was found)
+        return {"messages": HumanMessage(
+            content="No new recipes found, search with different names or ingredients"
+        )}
+
     llm = create_llm(
         reasoning=configurable.get("reasoning", True),
         model=configurable.get("model_name"),
@@ -17,48 +54,68 @@ async def critic_agent_node(state: RecipeSearchSubgraphState, config: Optional[R
         api_key=configurable.get("llm_api_key"),
         base_url=configurable.get("llm_api_url"),
         max_tokens=4096,
-    ).with_structured_output(RecipeSelection)
+        deadline=deadline,
+        schema=RecipeSelection,
+        registry=configurable.get("llm_registry"),
+    )
     
-    retry_runnable = StructuredRetryRunnable(llm, RecipeSelection)
+    retry_runnable = with_llm_cache(
+        StructuredRetryRunnable(llm, RecipeSelection, deadline=deadline),
+        "critic",
+        configurable,
+        temperature=0,
+        model=configurable.get("model_name"),
+        base_url=configurable.get("llm_api_url"),
+        reasoning=configurable.get("reasoning", True),
+        max_tokens=4096,
+    )
+
+    query = state.user_recipe_query
+    assert query is not None
+    query_text = format_recipe_query(query)
+    system_prompt = get_critic_prompt()
 
-    batch_size = configurable.get("batch_size", 5)
     max_concurrent = configurable.get("max_parallel_tasks", 2)
-    batches = [
-        state.current_recipes[i:i + batch_size] for i
-        in range(0, len(state.current_recipes), batch_size)
-    ]
+    batches = plan_critic_batches(state.current_recipes, query_text, configurable)
 
-    async def process_batch(batch) -> RecipeSelection:
-        recipes_text = "\n".join([
-            (
-                f"Recipe ID: {recipe.id}\n"
-                f"Title: {recipe.title}\n"
-                f"Ingredients: {', '.join([ing.name for ing in recipe.ingredients])}\n"
-                f"Total Calories: {recipe.total_calories}\n"
-            )
-            for recipe in batch
-        ])
-        query = state.user_recipe_query
-        assert query is not None
-        query_text = format_recipe_query(query)
-        system_prompt = get_critic_prompt()
+    async def process_batch(batch) -> tuple[list[Recipe], RecipeSelection]:
+        recipes_text = "\n".join([format_critic_recipe(recipe) for recipe in batch])
         user_message = format_critic_user_message(query_text, recipes_text)
         
         messages = [
             SystemMessage(content=system_prompt),
             HumanMessage(content=user_message)
         ]
-        return await retry_runnable.ainvoke(messages)
+        return batch, await retry_runnable.ainvoke(messages)
     tasks = [process_batch(batch) for batch in batches]
-    batched_result: list[RecipeSelection] = await batch_execute(tasks, max_concurrent)
-    flattened_ids = [recipe_id for result in batched_result for recipe_id in result.selected_recipe_ids]
-    set_selected_ids = set(flattened_ids)
-    selected_recipes = [
-        recipe for recipe in state.current_recipes
-        if recipe.id in set_selected_ids
-    ]
+    judged: list[tuple[list[Recipe], RecipeSelection]]
+    judged, _ = await adaptive_execute(
+        tasks, get_limiter(configurable.get("llm_api_url"), max_concurrent), deadline
+    )
+    batched_result = [result for _, result in judged]
+    partial = len(judged) < len(batches)
+
+    # recipes of batches dropped at the deadline get no verdict and stay eligible
+    verdicts = {}
+    selected_recipes = []
+    for batch, result in judged:
+        set_selected_ids = set(result.selected_recipe_ids)
+        for recipe in batch:
+            selected = recipe.id in set_selected_ids
+            verdicts[recipe.id] = RecipeVerdict(selected=selected, reason=result.reason)
+            if selected:
+                selected_recipes.append(recipe)
 
 
+    # the summary only steers the next iteration, which will not run without time left
+    if deadline is not None and deadline.expired(ITERATION_RESERVE):
+        return {
+            "selected_recipes": selected_recipes,
+            "verdicts": verdicts,
+            "partial": True,
+            "messages": HumanMessage(content="Search time budget exhausted"),
+        }
+
     llm = create_llm(
         reasoning=configurable.get("reasoning", True),
         model=configurable.get("model_name"),
@@ -66,6 +123,8 @@ async def critic_agent_node(state: RecipeSearchSubgraphState, config: Optional[R
         api_key=configurable.get("llm_api_key"),
         base_url=configurable.get("llm_api_url"),
         max_tokens=4096,
+        deadline=deadline,
+        registry=configurable.get("llm_registry"),
     )
     flattened_reasons = [result.reason for result in batched_result]
     reason_summary = await llm.ainvoke(
@@ -74,11 +133,17 @@ async def critic_agent_node(state: RecipeSearchSubgraphState, config: Optional[R
     
     return {
         "selected_recipes": selected_recipes,
+        "verdicts": verdicts,
+        "partial": partial,
         "messages": HumanMessage(content=reason_summary.content),
     }
 
 
-def route_after_critic(state: RecipeSearchSubgraphState):
+def route_after_critic(state: RecipeSearchSubgraphState, config: Optional[RunnableConfig] = None):
+    deadline = deadline_from_config(config)
+    if deadline is not None and deadline.expired(ITERATION_RESERVE):
+        print(f"Deadline close, ending with {len(state.selected_recipes)} selected recipes")
+        return END
     if state.iterations >= 3:
         return END
     if len(state.selected_recipes) >= 5:
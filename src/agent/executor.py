@@ -0,0 +1,173 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Any, Coroutine, NamedTuple
+
+from src.agent.constants import (LLM_MAX_CONCURRENCY, LLM_LATENCY_FACTOR,
+                                 LLM_DECREASE_COOLDOWN)
+from src.api_handler.deadline import Deadline, DeadlineExceeded
+
+
+class TaskTiming(NamedTuple):
+    index: int
+    queue_wait: float
+    service_time: float
+
+
+class ExecutionResult(NamedTuple):
+    results: list
+    timings: list[TaskTiming]
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for one LLM endpoint, shared by every request of the process.
+
+    Each task that finishes in under `latency_factor` times the best latency seen raises
+    the limit by 1/limit (about +1 per round of tasks); a slower task lowers it by 10%,
+    and a rate-limit (429) answer halves it, at most once per `cooldown` seconds.
+    """
+
+    def __init__(
+        self,
+        initial: float = 2,
+        max_limit: int = LLM_MAX_CONCURRENCY,
+        latency_factor: float = LLM_LATENCY_FACTOR,
+        cooldown: float = LLM_DECREASE_COOLDOWN,
+    ):
+        self.limit = float(min(max(initial, 1), max_limit))
+        self.max_limit = max_limit
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.best_latency: float | None = None
+        self._decreased_at = 0.0
+        self._cond: asyncio.Condition | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._cond is None or self._loop is not loop:
+            self._cond = asyncio.Condition()
+            self._loop = loop
+        return self._cond
+
+    async def acquire(self):
+        cond = self._condition()
+        async with cond:
+            await cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, service_time: float | None = None):
+        if service_time is not None:
+            self._observe(service_time)
+        cond = self._condition()
+        async with cond:
+            self.in_flight -= 1
+            cond.notify_all()
+
+    def _observe(self, latency: float):
+        if self.best_latency is None or latency < self.best_latency:
+            self.best_latency = latency
+        else:
+            # let the baseline follow a slower model or longer prompts over time
+            self.best_latency *= 1.01
+        if latency > self.latency_factor * self.best_latency:
+            self._decrease(0.9)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def on_rate_limit(self):
+        self._decrease(0.5)
+
+    def _decrease(self, factor: float):
+        now = time.monotonic()
+        if now - self._decreased_at < self.cooldown:
+            return
+        self._decreased_at = now
+        self.limit = max(1.0, self.limit * factor)
+
+
+_limiters: dict[str, AdaptiveLimiter] = {}
+_current: ContextVar[AdaptiveLimiter | None] = ContextVar("llm_limiter", default=None)
+
+
+def get_limiter(endpoint: str | None, initial: float = 2) -> AdaptiveLimiter:
+    """Limiter of an LLM endpoint (base_url); `initial` only applies when it is created."""
+    key = endpoint or ""
+    if key not in _limiters:
+        _limiters[key] = AdaptiveLimiter(initial)
+    return _limiters[key]
+
+
+def report_rate_limit():
+    """Called by LLM wrappers on a 429; shrinks the limiter running the current task."""
+    limiter = _current.get()
+    if limiter is not None:
+        limiter.on_rate_limit()
+
+
+async def adaptive_execute(
+    tasks: list[Coroutine[Any, Any, Any]],
+    limiter: AdaptiveLimiter,
+    deadline: Deadline | None = None,
+) -> ExecutionResult:
+    """Await `tasks` (coroutines) through `limiter`, starting the next one as soon as a
+    slot frees up. Results keep the order of `tasks`; timings hold the queue wait and
+    service time of every task that started, ordered by its index in `tasks`.
+
+    With a deadline, tasks not started before it has passed are skipped and tasks that run
+    out of time are dropped, so the results can be shorter than `tasks`. Other errors cancel
+    the remaining tasks and are raised.
+    """
+    dropped = object()
+    results: list[Any] = [dropped] * len(tasks)
+    timings: list[TaskTiming] = []
+    submitted = time.monotonic()
+    start_limit = limiter.limit
+
+    async def run(i: int, coro: Coroutine[Any, Any, Any]):
+        try:
+            await limiter.acquire()
+        except BaseException:
+            coro.close()
+            raise
+        started = time.monotonic()
+        service_time = None
+        try:
+            if deadline is not None and deadline.expired():
+                coro.close()
+                return
+            _current.set(limiter)
+            try:
+                results[i] = await coro
+                service_time = time.monotonic() - started
+            except (DeadlineExceeded, asyncio.TimeoutError):
+                if deadline is None:
+                    raise
+            finally:
+                timings.append(TaskTiming(i, started - submitted, time.monotonic() - started))
+        finally:
+            await limiter.release(service_time)
+
+    running = [asyncio.ensure_future(run(i, coro)) for i, coro in enumerate(tasks)]
+    try:
+        await asyncio.gather(*running)
+    except BaseException:
+        for task in running:
+            task.cancel()
+        raise
+    finally:
+        if timings:
+            waits = [t.queue_wait for t in timings]
+            services = [t.service_time for t in timings]
+            print(
+                f"Executed {len(timings)}/{len(tasks)} tasks, "
+                f"concurrency {start_limit:.1f} -> {limiter.limit:.1f}, "
+                f"queue wait avg {sum(waits) / len(waits):.2f}s max {max(waits):.2f}s, "
+                f"service avg {sum(services) / len(services):.2f}s max {max(services):.2f}s"
+            )
+
+    kept = [result for result in results if result is not dropped]
+    if len(kept) < len(tasks):
+        print(f"Deadline reached, dropped {len(tasks) - len(kept)} of {len(tasks)} tasks")
+    return ExecutionResult(kept, sorted(timings))
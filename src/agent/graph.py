@@ -5,20 +5,56 @@ from .states import AgentState
 from .clarification_agent import build_clarification_graph
 from .recipe_retrieval_agent import build_recipe_retrieval_graph
 from .report_generation import build_report_generation_graph
+from .critic_agent import ITERATION_RESERVE
+from .query_cache import query_result_cache
+from src.api_handler.deadline import deadline_from_config
 
 
 # adapter to prevent leakage to the subgraph state and vice versa
 async def call_subgraph(state: AgentState, subgraph: CompiledStateGraph, config = None) -> dict:
     input_state = {
         "user_recipe_query": state.user_recipe_query,
+        "allergies": state.user_profile.allergies,
     }
     result = await subgraph.ainvoke(input_state,config=config)
-    return {"selected_recipes": result.get("selected_recipes", [])}
+    return {
+        "selected_recipes": result.get("selected_recipes", []),
+        "partial": result.get("partial", False),
+    }
 
 
-async def recipe_retrieval_node(state: AgentState, config = None) -> dict:
-    recipe_retrieval_subgraph = build_recipe_retrieval_graph()
-    return await call_subgraph(state, recipe_retrieval_subgraph, config=config)
+def make_recipe_retrieval_node(subgraph: CompiledStateGraph):
+    # the subgraph is compiled once in build_graph and shared by all requests
+    async def recipe_retrieval_node(state: AgentState, config = None) -> dict:
+        deadline = deadline_from_config(config)
+        if deadline is not None and deadline.expired(ITERATION_RESERVE):
+            print("Deadline close, skipping recipe retrieval")
+            return {"selected_recipes": []}
+        configurable = config.get("configurable", {}) if config else {}
+        use_cache = configurable.get("query_cache", True) and state.user_recipe_query is not None
+        if use_cache:
+            # entries are shared across users: hits are re-filtered for this user's allergies
+            cached = query_result_cache.lookup(
+                state.user_recipe_query,
+                configurable.get("query_cache_threshold"),
+                allergies=state.user_profile.allergies,
+            )
+            if cached is not None:
+                return {"selected_recipes": cached}
+        result = await call_subgraph(state, subgraph, config=config)
+        # entries are shared: a search cut short by this request's deadline (skipped critic
+        # batches, or route_after_critic ending it for lack of time) is not cached
+        cut_short = result.pop("partial") or (
+            deadline is not None and deadline.expired(ITERATION_RESERVE)
+        )
+        if use_cache and not cut_short:
+            query_result_cache.store(
+                state.user_recipe_query,
+                result["selected_recipes"],
+                allergies=state.user_profile.allergies,
+            )
+        return result
+    return recipe_retrieval_node
 
 
 def build_graph(checkpointer=None):
@@ -28,7 +64,8 @@ def build_graph(checkpointer=None):
     graph.add_node("clarification", clarification_subgraph)
     
     # Заменяем partial на полноценный node с прокидкой config
-    graph.add_node("recipe_retrieval", recipe_retrieval_node)
+    recipe_retrieval_subgraph = build_recipe_retrieval_graph()
+    graph.add_node("recipe_retrieval", make_recipe_retrieval_node(recipe_retrieval_subgraph))
 
     report_generation_subgraph = build_report_generation_graph(checkpointer=checkpointer)
     graph.add_node("report_generation", report_generation_subgraph)
@@ -0,0 +1,85 @@
+import json
+from typing import Any, Generic, Type
+
+from pydantic import ValidationError
+from redis.asyncio import Redis
+from langchain_core.messages import BaseMessage, messages_to_dict
+from langchain_core.runnables import Runnable
+
+from src.api_handler.cache import make_cache_key, cache_get, cache_set, MISSING
+from src.agent.constants import LLM_CACHE_TTL
+from .utils import StructuredRetryRunnable, T
+
+LLM_CACHE_PREFIX = "llm"
+
+
+class CachedStructuredRunnable(Runnable, Generic[T]):
+    """Exact-match response cache in front of a StructuredRetryRunnable.
+
+    The key hashes `params` (model, base_url, reasoning, temperature, ... as passed to
+    create_llm), the output schema and the serialized messages; `with_llm_cache` only wraps
+    temperature 0 calls, whose answers are worth replaying. Only outputs that parsed into the
+    schema are stored, and they are validated again on the way out: an entry that no longer
+    fits is a miss.
+    """
+
+    def __init__(
+        self,
+        runnable: StructuredRetryRunnable[T],
+        redis: Redis | None,
+        params: dict,
+        ttl: int = LLM_CACHE_TTL,
+    ):
+        super().__init__()
+        self.runnable = runnable
+        self.model_class: Type[T] = runnable.model_class
+        self.redis = redis
+        self.params = params
+        self.ttl = ttl
+        # a changed schema must not be served answers written for the old one
+        self._schema = json.dumps(self.model_class.model_json_schema(), sort_keys=True)
+
+    def invoke(self, input: Any, config: Any = None, **kwargs) -> T:
+        raise NotImplementedError("This method is not implemented")
+
+    def cache_key(self, messages: list[BaseMessage]) -> str:
+        return make_cache_key(
+            f"{LLM_CACHE_PREFIX}:{self.model_class.__name__}",
+            self.params,
+            self._schema,
+            messages_to_dict(messages),
+        )
+
+    async def ainvoke(self, input: Any, config: Any = None, **kwargs) -> T:
+        messages = input if isinstance(input, list) else [input]
+        key = self.cache_key(messages)
+        cached = await cache_get(self.redis, key)
+        if cached is not MISSING:
+            try:
+                return self.model_class.model_validate(cached)
+            except ValidationError:
+                pass
+        result = await self.runnable.ainvoke(messages, config, **kwargs)
+        await cache_set(self.redis, key, result.model_dump(mode="json"), ttl=self.ttl)
+        return result
+
+
+def with_llm_cache(
+    runnable: StructuredRetryRunnable[T],
+    node: str,
+    configurable: dict,
+    temperature: float,
+    **params: Any,
+) -> Runnable:
+    """Wrap `runnable` in the response cache if `node` is listed in
+    `configurable["llm_cache_nodes"]`, a Redis client is configured and the call samples at
+    temperature 0; a sampled answer replayed from the cache would pin one draw forever."""
+    redis = configurable.get("redis")
+    if redis is None or node not in configurable.get("llm_cache_nodes", ()) or temperature != 0:
+        return runnable
+    return CachedStructuredRunnable(
+        runnable,
+        redis,
+        {**params, "temperature": temperature},
+        ttl=configurable.get("llm_cache_ttl", LLM_CACHE_TTL),
+    )
@@ -0,0 +1,79 @@
+from typing import Any, Hashable
+
+import httpx
+from langchain_openai import ChatOpenAI
+from langchain_core.runnables import Runnable
+
+from src.agent.constants import (LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE_CONNECTIONS,
+                                 LLM_KEEPALIVE_EXPIRY)
+
+_KEY_FIELDS = {"model", "base_url", "api_key", "max_tokens", "temperature"}
+
+
+def reasoning_config(reasoning: bool) -> dict:
+    if reasoning:
+        return {"reasoning": {"enabled": True, "effort": "high"}}
+    return {"reasoning": {"enabled": False, "effort": "low"}}
+
+
+class LLMRegistry:
+    """Chat models built once per configuration and reused for the life of the process.
+
+    Keyed by (model, base_url, api_key, reasoning, max_tokens, temperature, output schema);
+    every model shares one keep-alive HTTP pool, so the nodes of all requests reuse the
+    same connections to the LLM API. The backend keeps one registry in its app state and
+    passes it to the graph as `configurable["llm_registry"]`. The pool belongs to the event
+    loop that first used it.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        max_keepalive_connections: int = LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = LLM_KEEPALIVE_EXPIRY,
+    ):
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http_client: httpx.AsyncClient | None = None
+        self._models: dict[Hashable, Runnable] = {}
+
+    def http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            # per-call timeouts come from the openai client (request_timeout / timeout=)
+            self._http_client = httpx.AsyncClient(limits=self._limits, timeout=None)
+        return self._http_client
+
+    def get(self, reasoning: bool = False, schema: type | None = None, **kwargs: Any) -> Runnable:
+        """A ChatOpenAI for `kwargs`, with `.with_structured_output(schema)` applied if given."""
+        key = (
+            kwargs.get("model"),
+            kwargs.get("base_url"),
+            kwargs.get("api_key"),
+            reasoning,
+            kwargs.get("max_tokens"),
+            kwargs.get("temperature"),
+            schema,
+            tuple(sorted((k, repr(v)) for k, v in kwargs.items() if k not in _KEY_FIELDS)),
+        )
+        model = self._models.get(key)
+        if model is None:
+            model = ChatOpenAI(
+                **kwargs | reasoning_config(reasoning), http_async_client=self.http_client()
+            )
+            if schema is not None:
+                model = model.with_structured_output(schema)
+            self._models[key] = model
+        return model
+
+    async def aclose(self):
+        self._models.clear()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+
+# used when no registry is passed in the config, e.g. by scripts running the graph directly
+default_registry = LLMRegistry()
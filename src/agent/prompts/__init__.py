@@ -6,9 +6,11 @@ from .recipe_retrieval import (
     get_recipe_search_prompt,
     format_recipe_query,
     get_critic_prompt,
+    format_critic_recipe,
     format_critic_user_message,
     get_critic_negative_reason_summary,
     get_calories_estimation_system_prompt,
+    format_calories_recipe,
     format_calories_estimation_prompt,
 )
 
@@ -18,8 +20,10 @@ __all__ = [
     "get_recipe_search_prompt",
     "format_recipe_query",
     "get_critic_prompt",
+    "format_critic_recipe",
     "format_critic_user_message",
     "get_critic_negative_reason_summary",
     "get_calories_estimation_system_prompt",
+    "format_calories_recipe",
     "format_calories_estimation_prompt",
 ]
\ No newline at end of file
@@ -72,6 +72,15 @@ Your goal is to carefully review each recipe and select only those that truly me
 </Instructions>"""
 
 
+def format_critic_recipe(recipe) -> str:
+    return (
+        f"Recipe ID: {recipe.id}\n"
+        f"Title: {recipe.title}\n"
+        f"Ingredients: {', '.join([ing.name for ing in recipe.ingredients])}\n"
+        f"Total Calories: {recipe.total_calories}\n"
+    )
+
+
 def format_critic_user_message(query_text: str, recipes_text: str) -> str:
     return f"""{query_text}  
 
@@ -137,22 +146,24 @@ Respond ONLY with a JSON array, no additional text:
 </Output Format>"""
 
 
+def format_calories_recipe(recipe: dict) -> str:
+    ingredients_info = []
+    for ing in recipe["ingredients"]:
+        ingredients_info.append(f"  - {ing['name']}: {ing['amount']} (calories per 100g: {ing['calories']})  ")
+    return (
+        f"<Recipe id=\"{recipe['id']}\">  \n"
+        f"Title: {recipe['title']}  \n"
+        f"Ingredients:  \n" + "\n".join(ingredients_info) + "\n"
+        f"</Recipe>  "
+    )
+
+
 def format_calories_estimation_prompt(recipes_data: list[dict]) -> str:
-    prompt_parts = []
-    for recipe in recipes_data:
-        ingredients_info = []
-        for ing in recipe["ingredients"]:
-            ingredients_info.append(f"  - {ing['name']}: {ing['amount']} (calories per 100g: {ing['calories']})  ")
-        prompt_parts.append(
-            f"<Recipe id=\"{recipe['id']}\">  \n"
-            f"Title: {recipe['title']}  \n"
-            f"Ingredients:  \n" + "\n".join(ingredients_info) + "\n"
-            f"</Recipe>  "
-        )
+    prompt_parts = [format_calories_recipe(recipe) for recipe in recipes_data]
     
     return (
         "<Recipes to Analyze>  \n"
         + "\n\n".join(prompt_parts)
         + "\n</Recipes to Analyze>  \n\n"
         "Estimate total calories for each recipe and return the JSON array.  "
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,148 @@
+import time
+import zlib
+from collections import OrderedDict
+from typing import NamedTuple, Sequence
+
+from src.agent.constants import (QUERY_CACHE_THRESHOLD, QUERY_CACHE_MAX_ENTRIES,
+                                 QUERY_CACHE_TTL, QUERY_CACHE_PERMUTATIONS,
+                                 QUERY_CACHE_BANDS)
+from src.api_handler.datamodels import Recipe
+from src.api_handler.restrictions import resolve_restrictions, filter_recipes
+from src.api_handler.vocabulary import tokenize
+from .schemas.structured_output import UserRecipeQuery
+
+STOPWORDS = {
+    "a", "an", "and", "any", "as", "at", "but", "by", "can", "dish", "few", "for", "from",
+    "give", "i", "in", "into", "is", "it", "me", "meal", "my", "of", "on", "or", "please",
+    "recipe", "show", "some", "something", "suggest", "that", "the", "to", "want", "what",
+    "with", "would", "you",
+}
+
+_MAX_HASH = (1 << 32) - 1
+
+
+class CachedResult(NamedTuple):
+    tokens: frozenset[str]
+    # restrictions and allergies of the cached search that only the critic could check
+    unresolved: frozenset[str]
+    recipes: list[Recipe]
+    expires_at: float
+
+
+def query_tokens(query: UserRecipeQuery) -> frozenset[str]:
+    """Content words of the query text and preferences; order, plurals and filler words
+    do not matter ("quick chicken dinner" == "chicken for dinner, quick")."""
+    words = [query.query, *query.preferences]
+    return frozenset(t for text in words for t in tokenize(text) if t not in STOPWORDS)
+
+
+def jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class QueryResultCache:
+    """Selected recipes of finished searches, looked up by similar `UserRecipeQuery`s.
+
+    Queries are token sets; a MinHash signature split into LSH bands finds candidates whose
+    Jaccard similarity is likely high, and the exact Jaccard over the stored sets decides.
+    Entries are shared by all users, so on a hit (similarity >= `threshold`) the cached
+    recipes are filtered again against the current restrictions and user allergies (see
+    `resolve_restrictions`). A restriction or allergy that does not resolve to ingredient
+    terms must have been unresolved for the cached search too, which the critic judged.
+    Kept in process, LRU-bounded, with a TTL.
+    """
+
+    def __init__(
+        self,
+        threshold: float = QUERY_CACHE_THRESHOLD,
+        max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+        ttl: float = QUERY_CACHE_TTL,
+        permutations: int = QUERY_CACHE_PERMUTATIONS,
+        bands: int = QUERY_CACHE_BANDS,
+    ):
+        assert permutations % bands == 0
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._seeds = [zlib.crc32(f"seed{i}".encode()) for i in range(permutations)]
+        self._rows = permutations // bands
+        self._entries: OrderedDict[frozenset[str], CachedResult] = OrderedDict()
+        self._buckets: dict[tuple, set[frozenset[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _signature(self, tokens: frozenset[str]) -> list[int]:
+        hashes = [zlib.crc32(t.encode()) for t in tokens]
+        if not hashes:
+            return [_MAX_HASH] * len(self._seeds)
+        # one cheap "permutation" per seed: xor with the seed, then a 32-bit mix
+        return [min(((h ^ seed) * 0x9E3779B1) & _MAX_HASH for h in hashes) for seed in self._seeds]
+
+    def _bands(self, tokens: frozenset[str]) -> list[tuple]:
+        signature = self._signature(tokens)
+        return [
+            (i, *signature[i * self._rows:(i + 1) * self._rows])
+            for i in range(len(signature) // self._rows)
+        ]
+
+    def _remove(self, tokens: frozenset[str]):
+        self._entries.pop(tokens, None)
+        for band in self._bands(tokens):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(tokens)
+                if not bucket:
+                    del self._buckets[band]
+
+    def store(
+        self, query: UserRecipeQuery, recipes: list[Recipe], allergies: Sequence[str] = ()
+    ):
+        if not recipes:
+            return
+        tokens = query_tokens(query)
+        self._remove(tokens)
+        _, unresolved = resolve_restrictions([*query.restrictions, *allergies])
+        self._entries[tokens] = CachedResult(
+            tokens, frozenset(unresolved), list(recipes), time.monotonic() + self.ttl
+        )
+        for band in self._bands(tokens):
+            self._buckets.setdefault(band, set()).add(tokens)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def lookup(
+        self, query: UserRecipeQuery, threshold: float | None = None, allergies: Sequence[str] = ()
+    ) -> list[Recipe] | None:
+        threshold = self.threshold if threshold is None else threshold
+        tokens = query_tokens(query)
+        candidates = set()
+        for band in self._bands(tokens):
+            candidates |= self._buckets.get(band, set())
+
+        now = time.monotonic()
+        scored = []
+        for key in candidates:
+            entry = self._entries[key]
+            if entry.expires_at < now:
+                self._remove(key)
+                continue
+            similarity = jaccard(tokens, entry.tokens)
+            if similarity >= threshold:
+                scored.append((similarity, entry))
+
+        terms, unresolved = resolve_restrictions([*query.restrictions, *allergies])
+        for similarity, entry in sorted(scored, key=lambda item: -item[0]):
+            if not entry.unresolved.issuperset(unresolved):
+                continue
+            recipes = filter_recipes(entry.recipes, terms)
+            if recipes:
+                self._entries.move_to_end(entry.tokens)
+                print(f"Query cache hit ({similarity:.2f}), {len(recipes)} recipes")
+                return recipes
+        return None
+
+
+query_result_cache = QueryResultCache()
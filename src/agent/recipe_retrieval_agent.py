@@ -5,13 +5,16 @@ from langgraph.types import Command
 from pydantic import ValidationError
 from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
 from langchain_core.runnables.config import RunnableConfig
-from langgraph.graph import StateGraph, START
+from langgraph.graph import StateGraph, START, END
+from openai import APITimeoutError
 from langgraph.prebuilt import ToolNode
 from .states import RecipeSearchSubgraphState
 from .utils import create_llm
 from .prompts import get_recipe_search_prompt, format_recipe_query
 from .calorie_enrichment_agent import enrich_and_estimate_calories_node
-from src.agent.critic_agent import critic_agent_node, route_after_critic
+from .restriction_filter import restriction_prefilter_node
+from src.agent.critic_agent import critic_agent_node, route_after_critic, ITERATION_RESERVE
+from src.api_handler.deadline import deadline_from_config, DeadlineExceeded
 from src.tools.recipes_tools import search_recipes_by_name, search_recipes_by_ingredient, search_recipes_by_area, RecipeSearchResult
 
 
@@ -23,18 +26,25 @@ async def recipe_search_agent_node(state: RecipeSearchSubgraphState, config: Opt
         return Command(goto="critic_agent")
     
     configurable = config.get("configurable", {}) if config else {}
-    llm = create_llm(
+    deadline = deadline_from_config(config)
+    # a new round cannot finish in time: end with the recipes selected so far
+    if deadline is not None and deadline.expired(ITERATION_RESERVE):
+        print(f"Deadline close, ending search with {len(state.selected_recipes)} selected recipes")
+        return Command(goto=END, update={"partial": True})
+
+    tools = [search_recipes_by_name, search_recipes_by_ingredient, search_recipes_by_area]
+    llm_with_tools = create_llm(
         reasoning=configurable.get("reasoning", False),
         model=configurable.get("model_name"),
         temperature=0,
         api_key=configurable.get("llm_api_key"),
         base_url=configurable.get("llm_api_url"),
         max_tokens=4096,
+        deadline=deadline,
+        tools=tools,
+        registry=configurable.get("llm_registry"),
     )
     
-    tools = [search_recipes_by_name, search_recipes_by_ingredient, search_recipes_by_area]
-    llm_with_tools = llm.bind_tools(tools)
-    
     query = state.user_recipe_query
     query_text = format_recipe_query(query)
     
@@ -47,7 +57,12 @@ async def recipe_search_agent_node(state: RecipeSearchSubgraphState, config: Opt
             HumanMessage(content=query_text)
         ]
     
-    response = await llm_with_tools.ainvoke(messages, config=config)
+    try:
+        response = await llm_with_tools.ainvoke(messages, config=config)
+    except (APITimeoutError, DeadlineExceeded):
+        print(f"LLM call hit the deadline, ending search with "
+              f"{len(state.selected_recipes)} selected recipes")
+        return Command(goto=END, update={"partial": True})
     
     return Command(
         goto="tools",
@@ -93,11 +108,18 @@ async def tool_post_process(state: RecipeSearchSubgraphState, config: Optional[R
             seen_ids.add(recipe.id)
             unique_recipes.append(recipe)
 
+    # recipes judged in an earlier iteration keep their verdict; only new ones go on
+    # to calorie estimation and the critic
+    new_recipes = [recipe for recipe in unique_recipes if recipe.id not in state.verdicts]
+    if state.verdicts:
+        print(f"{len(unique_recipes) - len(new_recipes)} of {len(unique_recipes)} recipes "
+              f"already judged, {len(new_recipes)} new")
+
     # replacing content for context handling
     for msg in tool_messages:
         msg.content = "Successfully retrieved recipes"
     
-    return {"current_recipes": unique_recipes, "messages": tool_messages}
+    return {"current_recipes": new_recipes, "messages": tool_messages}
 
 
 def build_recipe_retrieval_graph(checkpointer=None):
@@ -109,13 +131,15 @@ def build_recipe_retrieval_graph(checkpointer=None):
     graph.add_node("recipe_search_agent", recipe_search_agent_node)
     graph.add_node("tools", tool_node)
     graph.add_node("tool_post_process", tool_post_process)
+    graph.add_node("restriction_prefilter", restriction_prefilter_node)
     graph.add_node("enrich_calories", enrich_and_estimate_calories_node)
     graph.add_node("critic_agent", critic_agent_node)
     
     graph.add_edge(START, "recipe_search_agent")
-    graph.add_edge("recipe_search_agent", "tools")
+    # recipe_search_agent routes itself (tools, critic_agent or END) through Command
     graph.add_edge("tools", "tool_post_process")
-    graph.add_edge("tool_post_process", "enrich_calories") 
+    graph.add_edge("tool_post_process", "restriction_prefilter")
+    graph.add_edge("restriction_prefilter", "enrich_calories")
     graph.add_edge("enrich_calories", "critic_agent")
     
     
@@ -0,0 +1,49 @@
+from collections import Counter
+from typing import Optional
+from langchain_core.runnables.config import RunnableConfig
+from .states import RecipeSearchSubgraphState
+from .schemas.objects import RecipeVerdict
+from .critic_agent import plan_critic_batches
+from .prompts import format_recipe_query
+from src.api_handler.restrictions import resolve_restrictions, violations
+
+
+# rule-based: recipes with an ingredient that a restriction or allergy plainly excludes
+# never reach calorie estimation or the critic
+async def restriction_prefilter_node(
+    state: RecipeSearchSubgraphState, config: Optional[RunnableConfig] = None
+) -> dict:
+    configurable = config.get("configurable", {}) if config else {}
+    if not configurable.get("restriction_prefilter", True):
+        return {}
+    query = state.user_recipe_query
+    terms, unresolved = resolve_restrictions([*query.restrictions, *state.allergies])
+    if not terms:
+        return {}
+
+    kept, dropped = [], {}
+    for recipe in state.current_recipes:
+        found = violations(recipe, terms)
+        if found:
+            dropped[recipe.id] = found
+        else:
+            kept.append(recipe)
+    if not dropped:
+        return {}
+
+    query_text = format_recipe_query(query)
+    saved = (
+        len(plan_critic_batches(state.current_recipes, query_text, configurable))
+        - len(plan_critic_batches(kept, query_text, configurable))
+    )
+    by_term = Counter(term for found in dropped.values() for term in found)
+    print(f"Restriction prefilter dropped {len(dropped)} of {len(state.current_recipes)} recipes "
+          f"({', '.join(f'{term}: {n}' for term, n in by_term.most_common())}), "
+          f"saving {saved} critic LLM calls; left to the critic: {unresolved or 'nothing'}")
+    return {
+        "current_recipes": kept,
+        "verdicts": {
+            recipe_id: RecipeVerdict(selected=False, reason=f"contains {', '.join(found)}")
+            for recipe_id, found in dropped.items()
+        },
+    }
@@ -5,3 +5,8 @@ class UserProfile(BaseModel):
     last_queries: list[str] = Field(default_factory=list)
     preferences: list[str] = Field(default_factory=list)
     allergies: list[str] = Field(default_factory=list)
+
+
+class RecipeVerdict(BaseModel):
+    selected: bool
+    reason: str = ""
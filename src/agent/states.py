@@ -1,7 +1,8 @@
+import operator
 from typing import Annotated
 from langgraph.graph.message import add_messages
 from pydantic import BaseModel
-from .schemas.objects import UserProfile
+from .schemas.objects import UserProfile, RecipeVerdict
 from .schemas.structured_output import UserRecipeQuery, ClarificationDecision, RecipeSelection
 from src.api_handler.datamodels import Recipe
 
@@ -11,6 +12,12 @@ def add_unique_recipes(existing: list[Recipe], new: list[Recipe]) -> list[Recipe
     return existing + [r for r in new if r.id not in seen_ids]
 
 
+def merge_verdicts(
+    existing: dict[str, RecipeVerdict], new: dict[str, RecipeVerdict]
+) -> dict[str, RecipeVerdict]:
+    return {**existing, **new}
+
+
 class AgentState(BaseModel):
     messages: Annotated[list, add_messages]
     user_profile: UserProfile = UserProfile()
@@ -20,7 +27,12 @@ class AgentState(BaseModel):
 class RecipeSearchSubgraphState(BaseModel):
     iterations: int = 0
     user_recipe_query: UserRecipeQuery
+    allergies: list[str] = []
     messages: Annotated[list, add_messages]
     current_recipes: list[Recipe] = []
     selected_recipes: Annotated[list[Recipe], add_unique_recipes] = []
+    # recipe id -> decision of an earlier iteration; those recipes are not judged again
+    verdicts: Annotated[dict[str, RecipeVerdict], merge_verdicts] = {}
+    # set once a deadline cut the search short (skipped batches, no time for a new round)
+    partial: Annotated[bool, operator.or_] = False
     recipe_selection: RecipeSelection | None = None
\ No newline at end of file
@@ -1,19 +1,37 @@
 import asyncio
 import json
+from openai import RateLimitError
 from typing import TypeVar, Type, Any, Generic
 from pydantic import BaseModel, ValidationError
-from langchain_openai import ChatOpenAI
 from langchain_core.runnables import Runnable
 from langchain_core.output_parsers import PydanticOutputParser
+from src.agent.constants import LLM_RATE_LIMIT_BACKOFF
+from src.api_handler.deadline import Deadline, DeadlineExceeded
+from .llm_registry import LLMRegistry, default_registry
+from .executor import report_rate_limit
 
 T = TypeVar('T', bound=BaseModel)
 
-def create_llm(reasoning=False, **kwargs):
-    if reasoning:
-        conf = {"reasoning": {"enabled": True, "effort": "high"}}
-    else:
-        conf = {"reasoning": {"enabled": False, "effort": "low"}}
-    return ChatOpenAI(**kwargs | conf)
+def create_llm(
+    reasoning=False,
+    deadline: Deadline | None = None,
+    schema: Type[BaseModel] | None = None,
+    tools: list | None = None,
+    registry: LLMRegistry | None = None,
+    **kwargs,
+) -> Runnable:
+    """Chat model from `registry` (shared process-wide), optionally with structured output
+    for `schema` or bound `tools`."""
+    if registry is None:
+        registry = default_registry
+    llm = registry.get(reasoning, schema, **kwargs)
+    if tools:
+        llm = llm.bind_tools(tools)
+    if deadline is not None and schema is None:
+        # no single HTTP call to the model may outlive the request; structured calls
+        # are bounded by StructuredRetryRunnable instead
+        llm = llm.bind(timeout=max(deadline.remaining(), 1.0))
+    return llm
 
 def clean_response(text: str) -> str:
     text = text.strip()
@@ -48,13 +66,15 @@ class StructuredRetryRunnable(Runnable, Generic[T]):
         self,
         llm: Runnable,
         model_class: Type[T],
-        max_retries: int = 3
+        max_retries: int = 3,
+        deadline: Deadline | None = None,
     ):
         super().__init__()
         self.llm = llm
         self.parser = PydanticOutputParser(pydantic_object=model_class)
         self.model_class = model_class
         self.max_retries = max_retries
+        self.deadline = deadline
     
     def invoke(self, input: Any, config: Any = None, **kwargs) -> T:
         # we dont really need sync, async would be enough
@@ -63,9 +83,14 @@ class StructuredRetryRunnable(Runnable, Generic[T]):
     async def ainvoke(self, input: Any, config: Any = None, **kwargs) -> T:
         messages = input if isinstance(input, list) else [input]
         
-        for _ in range(self.max_retries):
+        for attempt in range(self.max_retries):
+            if self.deadline is not None and self.deadline.expired():
+                raise DeadlineExceeded("Request deadline exceeded before the LLM answered")
             try:
-                response = await self.llm.ainvoke(messages, config=config)
+                response = await asyncio.wait_for(
+                    self.llm.ainvoke(messages, config=config),
+                    self.deadline.remaining() if self.deadline is not None else None,
+                )
                 if isinstance(response, BaseModel):
                     return response  # type: ignore
                 if hasattr(response, 'content'):
@@ -93,19 +118,12 @@ class StructuredRetryRunnable(Runnable, Generic[T]):
                     cleaned_text = clean_response(raw_text)
                     parsed = parse_with_retry(self.model_class, cleaned_text)
                     return parsed
+            except RateLimitError as e:
+                print(f"rate limited: {e}")
+                report_rate_limit()
+                await asyncio.sleep(LLM_RATE_LIMIT_BACKOFF * (attempt + 1))
             except Exception as e:
                 print(f"exception: {e}")
                 pass
         
         raise ValueError(f"Failed after max retries: {messages}")
-
-
-async def batch_execute(tasks, max_concurrent):
-    results = []
-    for i in range(0, len(tasks), max_concurrent):
-        batch = tasks[i:i + max_concurrent]
-        batch_results = await asyncio.gather(*batch)
-        results.extend(batch_results)
-        if i + max_concurrent < len(tasks):
-            await asyncio.sleep(1)
-    return results
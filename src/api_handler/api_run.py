@@ -5,12 +5,17 @@ from src.api_handler.recipes_client import RecipesAPIClient
 from src.api_handler.nutrition_client import NutritionAPIClient
 from src.api_handler.nutrition_funcs import enrich_recipes_with_nutrition
 from src.api_handler.datamodels import RecipeSearchQuery
+from src.api_handler.catalog import RecipeCatalog
+from src.api_handler.nutrition_db import NutritionDatabase
+from src.api_handler.transport import close_transport
 
 
 async def api_run(include_ingredients: list[str] = ["chicken", "honey"],
                   exclude_ingredients: list[str] = ["mushroom"]):
-    meal_client = RecipesAPIClient()
-    nutrition_client = NutritionAPIClient()
+    catalog = RecipeCatalog()
+    meal_client = RecipesAPIClient(catalog=catalog)
+    nutrition_db = NutritionDatabase()
+    nutrition_client = NutritionAPIClient(nutrition_db=nutrition_db)
 
     query = RecipeSearchQuery(
         include_ingredients=include_ingredients,
@@ -28,6 +33,9 @@ async def api_run(include_ingredients: list[str] = ["chicken", "honey"],
 
     await meal_client.close()
     await nutrition_client.close()
+    catalog.close()
+    nutrition_db.close()
+    await close_transport()
 
     return  enriched_recipes
 
@@ -1,8 +1,22 @@
+import asyncio
 import json
 import hashlib
+import random
+import time
+from collections import OrderedDict
 from functools import wraps
-from typing import Callable, Any
+from typing import Awaitable, Callable, Any
 from redis.asyncio import Redis
+from redis.exceptions import LockError
+
+from src.api_handler.serialization import get_serializer
+from src.api_handler.circuit_breaker import CircuitOpen
+from src.api_handler.deadline import DeadlineExceeded, current_deadline, use_deadline
+from src.api_handler.constants import (LOCAL_CACHE_MAX_BYTES, LOCAL_CACHE_TTL, NEGATIVE_CACHE_TTL,
+                                       SINGLE_FLIGHT_LOCK_TTL, SINGLE_FLIGHT_POLL_INTERVAL,
+                                       CACHE_TTL_JITTER)
+
+MISSING = object()
 
 
 def make_cache_key(prefix: str, *args, **kwargs) -> str:
@@ -11,24 +25,375 @@ def make_cache_key(prefix: str, *args, **kwargs) -> str:
     return f"{prefix}:{h}"
 
 
-def redis_cache(prefix: str, ttl: int = 3600):
+class LocalCache:
+    """In-process LRU tier in front of Redis, bounded by the serialized size of its entries.
+
+    Values are kept deserialized, so callers must treat them as read-only.
+    """
+
+    def __init__(self, max_bytes: int = LOCAL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            self.delete(key)
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float, size: int):
+        self.delete(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def delete(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+
+local_cache = LocalCache()
+
+
+def _is_negative(value: Any) -> bool:
+    return value is None or value == [] or value == {}
+
+
+def jittered(ttl: int, jitter: float = CACHE_TTL_JITTER) -> int:
+    # spread expiries of keys written together, e.g. by one search or a warm-up run
+    return max(1, round(ttl * random.uniform(1 - jitter, 1 + jitter)))
+
+
+def is_stale(value: Any, remaining: float | None, ttl: int, soft_ttl: int | None) -> bool:
+    # remaining is None for local hits, which are younger than LOCAL_CACHE_TTL anyway
+    if not soft_ttl or remaining is None or _is_negative(value):
+        return False
+    return remaining < ttl - soft_ttl
+
+
+async def cache_get(redis: Redis | None, key: str, default: Any = MISSING) -> Any:
+    value = local_cache.get(key)
+    if value is not MISSING:
+        return value
+    if not redis:
+        return default
+    raw = await redis.get(key)
+    if raw is None:
+        return default
+    value = get_serializer().loads(raw)
+    local_cache.set(key, value, LOCAL_CACHE_TTL, len(raw))
+    return value
+
+
+async def cache_get_with_ttl(redis: Redis | None, key: str) -> tuple[Any, float | None]:
+    """Like cache_get, but also returns the remaining Redis TTL (GET and TTL share a pipeline)."""
+    value = local_cache.get(key)
+    if value is not MISSING or not redis:
+        return value, None
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.get(key)
+        pipe.ttl(key)
+        raw, remaining = await pipe.execute()
+    if raw is None:
+        return MISSING, None
+    value = get_serializer().loads(raw)
+    local_cache.set(key, value, LOCAL_CACHE_TTL, len(raw))
+    return value, remaining if remaining >= 0 else None
+
+
+async def cache_set(redis: Redis | None, key: str, value: Any, ttl: int = 3600) -> None:
+    raw = get_serializer().dumps(value)
+    local_cache.set(key, value, min(ttl, LOCAL_CACHE_TTL), len(raw))
+    if redis:
+        await redis.set(key, raw, ex=jittered(ttl))
+
+
+# batch counterparts of cache_get / cache_set: same serialization, so keys built with
+# make_cache_key(prefix, ...) read and write the decorators' entries
+async def cache_get_many(redis: Redis | None, keys: list[str], default: Any = None) -> list[Any]:
+    values = [local_cache.get(key) for key in keys]
+    remote = [i for i, value in enumerate(values) if value is MISSING]
+    if redis and remote:
+        raws = await redis.mget([keys[i] for i in remote])
+        for i, raw in zip(remote, raws):
+            if raw is not None:
+                values[i] = get_serializer().loads(raw)
+                local_cache.set(keys[i], values[i], LOCAL_CACHE_TTL, len(raw))
+    return [default if value is MISSING else value for value in values]
+
+
+async def cache_get_many_with_ttl(
+    redis: Redis | None, keys: list[str], default: Any = None
+) -> tuple[list[Any], list[float | None]]:
+    """Like cache_get_many, but also returns the remaining Redis TTL of each key."""
+    values = [local_cache.get(key) for key in keys]
+    remaining: list[float | None] = [None] * len(keys)
+    remote = [i for i, value in enumerate(values) if value is MISSING]
+    if redis and remote:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.mget([keys[i] for i in remote])
+            for i in remote:
+                pipe.ttl(keys[i])
+            raws, *ttls = await pipe.execute()
+        for i, raw, key_ttl in zip(remote, raws, ttls):
+            if raw is not None:
+                values[i] = get_serializer().loads(raw)
+                remaining[i] = key_ttl if key_ttl >= 0 else None
+                local_cache.set(keys[i], values[i], LOCAL_CACHE_TTL, len(raw))
+    return [default if value is MISSING else value for value in values], remaining
+
+
+async def cache_set_many(redis: Redis | None, items: dict[str, Any], ttl: int = 3600) -> None:
+    if not items:
+        return
+    serializer = get_serializer()
+    raws = {key: serializer.dumps(value) for key, value in items.items()}
+    for key, value in items.items():
+        local_cache.set(key, value, min(ttl, LOCAL_CACHE_TTL), len(raws[key]))
+    if not redis:
+        return
+    async with redis.pipeline(transaction=False) as pipe:
+        for key, raw in raws.items():
+            pipe.set(key, raw, ex=jittered(ttl))
+        await pipe.execute()
+
+
+_inflight: dict[str, asyncio.Task] = {}
+_waiters: dict[asyncio.Task, int] = {}
+
+
+async def coalesce(key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+    """Await one shared `load()` per key for all concurrent callers in this process.
+
+    The load runs as its own task, so a cancelled caller does not cancel it for the others;
+    it is cancelled only when every caller has gone away, e.g. searches that already have
+    enough results. It runs without a request deadline: each caller only waits for it
+    within its own deadline and gets DeadlineExceeded when that runs out.
+    """
+    task = _inflight.get(key)
+    if task is None:
+        # a task copies the creator's context; the load must not run on that request's budget
+        with use_deadline(None):
+            task = asyncio.ensure_future(load())
+        _inflight[key] = task
+
+        def _done(t: asyncio.Task):
+            _inflight.pop(key, None)
+            # mark the exception as retrieved if every caller went away
+            if not t.cancelled():
+                t.exception()
+
+        task.add_done_callback(_done)
+    _waiters[task] = _waiters.get(task, 0) + 1
+    deadline = current_deadline()
+    try:
+        if deadline is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), deadline.timeout())
+        except asyncio.TimeoutError:
+            if task.done():
+                raise
+            raise DeadlineExceeded("Request deadline exceeded") from None
+    finally:
+        _waiters[task] -= 1
+        if not _waiters[task]:
+            del _waiters[task]
+            if not task.done():
+                task.cancel()
+
+
+async def single_flight(
+    redis: Redis | None,
+    key: str,
+    lookup: Callable[[], Awaitable[Any]],
+    load: Callable[[], Awaitable[Any]],
+) -> Any:
+    """One upstream `load()` per cache key across callers and backend workers.
+
+    Inside a process callers share a future; across processes the loader holds a Redis lock
+    and the other workers poll `lookup()` until the value is published or the lock is gone.
+    """
+    if not redis:
+        return await coalesce(key, load)
+
+    async def load_locked() -> Any:
+        deadline = time.monotonic() + SINGLE_FLIGHT_LOCK_TTL
+        while time.monotonic() < deadline:
+            lock = redis.lock(f"lock:{key}", timeout=SINGLE_FLIGHT_LOCK_TTL, thread_local=False)
+            if await lock.acquire(blocking=False):
+                try:
+                    # another worker may have finished between our miss and the lock
+                    cached = await lookup()
+                    if cached is not MISSING:
+                        return cached
+                    return await load()
+                finally:
+                    try:
+                        await lock.release()
+                    except LockError:
+                        pass
+            await asyncio.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+            cached = await lookup()
+            if cached is not MISSING:
+                return cached
+        return await load()
+
+    return await coalesce(key, load_locked)
+
+
+_background: set[asyncio.Task] = set()
+
+
+def refresh_in_background(redis: Redis | None, key: str, load: Callable[[], Awaitable[Any]]):
+    """Schedule `load()` to rewrite a stale key, at most once per key across workers."""
+    if f"refresh:{key}" in _inflight:
+        return
+
+    async def refresh():
+        if not redis:
+            return await load()
+        lock = redis.lock(f"lock:refresh:{key}", timeout=SINGLE_FLIGHT_LOCK_TTL, thread_local=False)
+        if not await lock.acquire(blocking=False):
+            return
+        try:
+            await load()
+        finally:
+            try:
+                await lock.release()
+            except LockError:
+                pass
+
+    async def run():
+        try:
+            await coalesce(f"refresh:{key}", refresh)
+        except Exception as e:
+            print(f"Error refreshing {key}: {e}")
+
+    # outlives the request that noticed the stale key, so it does not inherit its deadline
+    with use_deadline(None):
+        task = asyncio.ensure_future(run())
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+def redis_cache(
+    prefix: str,
+    ttl: int = 3600,
+    soft_ttl: int | None = None,
+    negative_ttl: int | None = NEGATIVE_CACHE_TTL,
+):
+    """Two-tier (in-process LRU + Redis) cache for async client methods.
+
+    `ttl` is the hard expiry. With `soft_ttl`, entries older than that are still returned
+    right away while a background task refreshes them (stale-while-revalidate).
+    None and empty results are kept for `negative_ttl` seconds, or not at all if it is None.
+    """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def wrapper(self, *args, **kwargs) -> Any:
             redis: Redis | None = getattr(self, "_redis", None)
             cache_key = make_cache_key(prefix, *args, **kwargs)
 
-            if redis:
-                cached = await redis.get(cache_key)
-                if cached:
-                    return json.loads(cached)
+            async def lookup() -> Any:
+                return await cache_get(redis, cache_key)
 
-            result = await func(self, *args, **kwargs)
+            async def load() -> Any:
+                result = await func(self, *args, **kwargs)
+                if not _is_negative(result):
+                    await cache_set(redis, cache_key, result, ttl=ttl)
+                elif negative_ttl:
+                    await cache_set(redis, cache_key, result, ttl=negative_ttl)
+                return result
 
-            if redis and result is not None:
-                await redis.set(cache_key, json.dumps(result, default=str), ex=ttl)
-
-            return result
+            cached, remaining = await cache_get_with_ttl(redis, cache_key)
+            if cached is not MISSING:
+                if is_stale(cached, remaining, ttl, soft_ttl):
+                    refresh_in_background(redis, cache_key, load)
+                return cached
+            return await single_flight(redis, cache_key, lookup, load)
         return wrapper
     return decorator
 
+
+def redis_id_cache(
+    prefix: str,
+    record_prefix: str,
+    ttl: int = 3600,
+    soft_ttl: int | None = None,
+    id_field: str = "id",
+    negative_ttl: int | None = NEGATIVE_CACHE_TTL,
+):
+    """Cache for methods returning lists of records.
+
+    The query key holds only the ordered record IDs; each record is stored once under
+    `record_prefix` and shared by every query that returns it. A hit is served with one
+    GET plus one MGET; if any record has expired the call falls through to `func`.
+    `soft_ttl` and `negative_ttl` behave as in redis_cache. While the upstream's circuit is
+    open, a query whose records partly expired returns the ones still cached.
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs) -> Any:
+            redis: Redis | None = getattr(self, "_redis", None)
+            cache_key = make_cache_key(prefix, *args, **kwargs)
+
+            async def hydrate(ids: Any) -> Any:
+                if ids is MISSING:
+                    return MISSING
+                records = await cache_get_many(
+                    redis, [make_cache_key(record_prefix, i) for i in ids]
+                )
+                if any(r is None for r in records):
+                    return MISSING
+                return records
+
+            async def lookup() -> Any:
+                return await hydrate(await cache_get(redis, cache_key))
+
+            async def load() -> Any:
+                result = await func(self, *args, **kwargs)
+                if result:
+                    items = {make_cache_key(record_prefix, r[id_field]): r for r in result}
+                    items[cache_key] = [r[id_field] for r in result]
+                    await cache_set_many(redis, items, ttl=ttl)
+                elif result is not None and negative_ttl:
+                    await cache_set(redis, cache_key, [], ttl=negative_ttl)
+                return result
+
+            ids, remaining = await cache_get_with_ttl(redis, cache_key)
+            cached = await hydrate(ids)
+            if cached is not MISSING:
+                if is_stale(cached, remaining, ttl, soft_ttl):
+                    refresh_in_background(redis, cache_key, load)
+                return cached
+            try:
+                return await single_flight(redis, cache_key, lookup, load)
+            except CircuitOpen:
+                if ids is MISSING:
+                    raise
+                # upstream down: the records of the last result that are still cached
+                records = await cache_get_many(
+                    redis, [make_cache_key(record_prefix, i) for i in ids]
+                )
+                return [r for r in records if r is not None]
+        return wrapper
+    return decorator
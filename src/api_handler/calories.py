@@ -0,0 +1,148 @@
+import re
+from fractions import Fraction
+
+from src.api_handler.datamodels import Recipe
+from src.api_handler.vocabulary import canonical_tokens, tokenize
+
+MASS_UNITS = {
+    "g": 1.0, "gr": 1.0, "gram": 1.0, "kg": 1000.0, "kilogram": 1000.0, "mg": 0.001,
+    "oz": 28.35, "ounce": 28.35, "lb": 453.6, "lbs": 453.6, "pound": 453.6,
+}
+
+# millilitres; UK measures where MealDB's British recipes differ from US ones
+VOLUME_UNITS = {
+    "ml": 1.0, "millilitre": 1.0, "milliliter": 1.0, "cl": 10.0, "dl": 100.0,
+    "l": 1000.0, "litre": 1000.0, "liter": 1000.0,
+    "tsp": 5.0, "teaspoon": 5.0, "dessertspoon": 10.0,
+    "tbsp": 15.0, "tbs": 15.0, "tblsp": 15.0, "tbls": 15.0, "tablespoon": 15.0,
+    "cup": 240.0, "pint": 568.0, "quart": 946.0, "floz": 29.6,
+}
+
+# grams per unit, for units that are neither mass nor volume
+COUNT_UNITS = {
+    "pinch": 0.4, "dash": 0.6, "sprinkling": 1.0, "sprig": 1.0, "leaf": 0.5, "leave": 0.5,
+    "clove": 4.0, "zest": 2.0, "juice": 30.0, "knob": 15.0, "slice": 30.0, "rasher": 25.0,
+    "handful": 30.0, "bunch": 50.0,
+    "stick": 113.0, "can": 400.0, "tin": 400.0, "jar": 300.0, "packet": 250.0,
+    "fillet": 150.0, "breast": 170.0, "thigh": 110.0, "stalk": 40.0,
+}
+
+# grams per ml by ingredient token; liquids and anything unlisted count as water
+DENSITIES = {
+    "oil": 0.92, "butter": 0.96, "flour": 0.53, "cornflour": 0.53, "sugar": 0.85,
+    "icing": 0.56, "cocoa": 0.42, "rice": 0.85, "oat": 0.41, "honey": 1.42, "syrup": 1.37,
+    "treacle": 1.4, "molasses": 1.4, "salt": 1.2, "breadcrumb": 0.45, "cheese": 0.45,
+    "parmesan": 0.4, "almond": 0.6, "nut": 0.6, "pea": 0.65, "lentil": 0.8, "yogurt": 1.03,
+    "milk": 1.03, "cream": 1.0, "spinach": 0.2, "herb": 0.2, "coriander": 0.2, "parsley": 0.2,
+    "basil": 0.2, "mint": 0.2,
+}
+
+# grams per item when the measure is a bare count ("2", "1 large")
+PIECE_WEIGHTS = {
+    "egg": 50.0, "onion": 150.0, "shallot": 40.0, "garlic": 4.0, "potato": 170.0,
+    "tomato": 120.0, "carrot": 60.0, "lemon": 100.0, "lime": 65.0, "orange": 130.0,
+    "apple": 180.0, "banana": 120.0, "avocado": 150.0, "pepper": 150.0, "courgette": 200.0,
+    "aubergine": 250.0, "cucumber": 300.0, "chilli": 15.0, "celery": 40.0, "leek": 90.0,
+    "mushroom": 18.0, "breast": 170.0, "thigh": 110.0, "fillet": 150.0, "tortilla": 45.0,
+    "bread": 30.0, "pita": 60.0, "bay": 0.2, "star": 0.5, "clove": 4.0,
+}
+
+SIZE_FACTORS = {"small": 0.7, "medium": 1.0, "large": 1.3, "big": 1.3, "jumbo": 1.5}
+
+# measures that do not add calories worth counting
+NEGLIGIBLE = re.compile(r"\b(to taste|taste|garnish|to serve|as required|as needed|optional)\b")
+ZERO_CALORIE = {"water", "salt", "ice", "sea salt", "black pepper", "bay leaf", "cold water"}
+
+_NUMBER = re.compile(r"(\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?)")
+_UNICODE_FRACTIONS = {
+    "½": " 1/2", "¼": " 1/4", "¾": " 3/4", "⅓": " 1/3", "⅔": " 2/3", "⅛": " 1/8",
+}
+
+
+def _parse_number(text: str) -> float:
+    total = Fraction(0)
+    for part in text.split():
+        total += Fraction(part)
+    return float(total)
+
+
+def _density(tokens: list[str]) -> float:
+    # first listed token wins, so "icing sugar" reads as icing sugar, not sugar
+    for token in tokens:
+        if token in DENSITIES:
+            return DENSITIES[token]
+    return 1.0
+
+
+def _piece_weight(tokens: list[str]) -> float | None:
+    # the head noun comes last: "garlic clove", "red onion", "chicken breast"
+    for token in reversed(tokens):
+        if token in PIECE_WEIGHTS:
+            return PIECE_WEIGHTS[token]
+    return None
+
+
+def measure_to_grams(amount: str | None, ingredient: str) -> float | None:
+    """Grams for a MealDB measure such as "200g", "2 tbsp", "1 1/2 cups" or "3 large";
+    0 for "to taste" style measures and None when it cannot be resolved."""
+    if not amount or not amount.strip():
+        return None
+    text = amount.lower()
+    for char, replacement in _UNICODE_FRACTIONS.items():
+        text = text.replace(char, replacement)
+    if NEGLIGIBLE.search(text):
+        return 0.0
+    text = re.sub(r"fl\.?\s*oz", "floz", text)
+
+    match = _NUMBER.search(text)
+    quantity = _parse_number(match.group(1)) if match else 1.0
+    rest = text[match.end():] if match else text
+    # "2-3 cloves": take the lower bound
+    rest = re.sub(r"^\s*(-|to)\s*\d+(?:\.\d+)?", "", rest)
+    # "juice of 1", "zest and juice of 2": the units precede the count and weigh far less
+    # than the whole fruit
+    lead = tokenize(text[:match.start()]) if match else []
+    lead = [COUNT_UNITS[w] for w in lead if w in COUNT_UNITS]
+    if lead:
+        return quantity * sum(lead)
+    words = tokenize(rest)
+    ingredient_tokens = canonical_tokens(ingredient)
+
+    for word in words:
+        if word in MASS_UNITS:
+            return quantity * MASS_UNITS[word]
+        if word in VOLUME_UNITS:
+            return quantity * VOLUME_UNITS[word] * _density(ingredient_tokens)
+        if word in COUNT_UNITS:
+            return quantity * COUNT_UNITS[word]
+
+    if not match and not any(w in SIZE_FACTORS for w in words):
+        return None
+    piece = _piece_weight(ingredient_tokens)
+    if piece is None:
+        return None
+    size = next((SIZE_FACTORS[w] for w in words if w in SIZE_FACTORS), 1.0)
+    return quantity * piece * size
+
+
+def estimate_recipe_calories(recipe: Recipe) -> tuple[float, float]:
+    """Total kcal over the ingredients that could be resolved, and the share of ingredients
+    that were resolved. Negligible measures and zero-calorie ingredients count as resolved."""
+    if not recipe.ingredients:
+        return 0.0, 0.0
+    grams = []
+    kcal_per_gram = []
+    covered = 0
+    for ing in recipe.ingredients:
+        if " ".join(canonical_tokens(ing.name)) in ZERO_CALORIE:
+            covered += 1
+            continue
+        weight = measure_to_grams(ing.amount, ing.name)
+        if weight == 0.0:
+            covered += 1
+        elif weight is not None and ing.calories_per100g is not None:
+            grams.append(weight)
+            kcal_per_gram.append(ing.calories_per100g / 100)
+            covered += 1
+    total = sum(g * k for g, k in zip(grams, kcal_per_gram))
+    return total, covered / len(recipe.ingredients)
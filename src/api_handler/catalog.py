@@ -0,0 +1,210 @@
+import asyncio
+import json
+import sqlite3
+import string
+from pathlib import Path
+
+import httpx
+from tenacity import retry, stop_after_attempt, wait_exponential
+
+from src.api_handler.constants import RECIPES_URL, CATALOG_PATH
+from src.api_handler.recipes_funcs import map_mealdb_meal_to_recipe
+from src.api_handler.recipe_index import recipe_index
+from src.api_handler.vocabulary import TOKENIZER_VERSION, canonical_area, canonical_tokens, tokenize
+from src.api_handler.transport import create_client
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    area TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_recipes_area ON recipes (area);
+
+CREATE TABLE IF NOT EXISTS ingredient_index (
+    token TEXT NOT NULL,
+    recipe_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (token, recipe_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS title_index (
+    token TEXT NOT NULL,
+    recipe_id TEXT NOT NULL,
+    PRIMARY KEY (token, recipe_id)
+);
+"""
+
+
+class RecipeCatalog:
+    """Local mirror of the MealDB catalog with precomputed ingredient, area and title indexes.
+
+    Records are stored as `Recipe.model_dump()` dicts, the same shape the API client caches.
+    """
+
+    def __init__(self, path: str = CATALOG_PATH):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != TOKENIZER_VERSION:
+            self.reindex()
+
+    def close(self):
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+
+    def _index(self, recipe_id: str, title: str, ingredient_names: list[str]):
+        self._conn.execute("DELETE FROM ingredient_index WHERE recipe_id = ?", (recipe_id,))
+        self._conn.execute("DELETE FROM title_index WHERE recipe_id = ?", (recipe_id,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO ingredient_index (token, recipe_id, position) "
+            "VALUES (?, ?, ?)",
+            [
+                (token, recipe_id, pos)
+                for pos, name in enumerate(ingredient_names)
+                for token in canonical_tokens(name)
+            ],
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO title_index (token, recipe_id) VALUES (?, ?)",
+            [(token, recipe_id) for token in tokenize(title)],
+        )
+
+    def upsert_meals(self, meals: list[dict]) -> int:
+        with self._conn:
+            for meal in meals:
+                recipe = map_mealdb_meal_to_recipe(meal)
+                area = canonical_area(meal.get("strArea") or "") or None
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO recipes (id, title, area, payload) VALUES (?, ?, ?, ?)",
+                    (recipe.id, recipe.title, area, json.dumps(recipe.model_dump())),
+                )
+                names = [ing.name for ing in recipe.ingredients]
+                self._index(recipe.id, recipe.title, names)
+                recipe_index.add(recipe.id, names)
+        return len(meals)
+
+    def reindex(self):
+        """Rebuild the token indexes from the stored records after the tokenizer changed."""
+        rows = self._conn.execute("SELECT id, payload FROM recipes").fetchall()
+        with self._conn:
+            for recipe_id, payload in rows:
+                recipe = json.loads(payload)
+                self._index(recipe_id, recipe["title"], [i["name"] for i in recipe["ingredients"]])
+            self._conn.execute(f"PRAGMA user_version = {TOKENIZER_VERSION}")
+        if rows:
+            print(f"Reindexed {len(rows)} catalog recipes")
+
+    def load_index(self) -> int:
+        """Index every stored recipe in the in-memory recipe index, so searches score
+        catalog hits without tokenizing them first."""
+        count = 0
+        for (payload,) in self._conn.execute("SELECT payload FROM recipes"):
+            recipe_index.add_record(json.loads(payload))
+            count += 1
+        return count
+
+    def ingredient_names(self) -> list[str]:
+        """Every ingredient spelling used by the stored recipes."""
+        names: dict[str, None] = {}
+        for (payload,) in self._conn.execute("SELECT payload FROM recipes"):
+            names.update((i["name"], None) for i in json.loads(payload)["ingredients"])
+        return list(names)
+
+    def get_many(self, ids: list[str]) -> dict[str, dict]:
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        rows = self._conn.execute(
+            f"SELECT id, payload FROM recipes WHERE id IN ({placeholders})", list(ids)
+        ).fetchall()
+        return {row[0]: json.loads(row[1]) for row in rows}
+
+    def _ordered(self, ids: list[str]) -> list[dict]:
+        found = self.get_many(ids)
+        return [found[i] for i in ids if i in found]
+
+    def ingredient_ids(self, ingredient: str) -> list[str]:
+        # every query token has to hit the same ingredient line, so "chicken breast"
+        # does not match a recipe with "chicken stock" and "duck breast"
+        tokens = sorted(set(canonical_tokens(ingredient)))
+        if not tokens:
+            return []
+        placeholders = ",".join("?" * len(tokens))
+        rows = self._conn.execute(
+            f"""
+            SELECT i.recipe_id FROM ingredient_index i JOIN recipes r ON r.id = i.recipe_id
+            WHERE i.token IN ({placeholders})
+            GROUP BY i.recipe_id, i.position
+            HAVING COUNT(DISTINCT i.token) = ?
+            ORDER BY r.title
+            """,
+            [*tokens, len(tokens)],
+        ).fetchall()
+        return list(dict.fromkeys(row[0] for row in rows))
+
+    def area_ids(self, area: str) -> list[str]:
+        rows = self._conn.execute(
+            "SELECT id FROM recipes WHERE area = ? ORDER BY title", (canonical_area(area),)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def search_by_ingredient(self, ingredient: str) -> list[dict]:
+        return self._ordered(self.ingredient_ids(ingredient))
+
+    def search_by_area(self, area: str) -> list[dict]:
+        return self._ordered(self.area_ids(area))
+
+    def search_by_name(self, query: str) -> list[dict]:
+        tokens = sorted(set(tokenize(query)))
+        if not tokens:
+            return []
+        placeholders = ",".join("?" * len(tokens))
+        rows = self._conn.execute(
+            f"""
+            SELECT t.recipe_id FROM title_index t JOIN recipes r ON r.id = t.recipe_id
+            WHERE t.token IN ({placeholders})
+            GROUP BY t.recipe_id
+            HAVING COUNT(DISTINCT t.token) = ?
+            ORDER BY r.title
+            """,
+            [*tokens, len(tokens)],
+        ).fetchall()
+        return self._ordered([row[0] for row in rows])
+
+
+@retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=2, max=30))
+async def _fetch_meals_by_letter(client: httpx.AsyncClient, letter: str) -> list[dict]:
+    resp = await client.get("/search.php", params={"f": letter})
+    resp.raise_for_status()
+    return resp.json().get("meals") or []
+
+
+async def ingest_catalog(catalog: RecipeCatalog, delay: float = 0.3) -> int:
+    """Mirror the whole MealDB catalog: `search.php?f=<letter>` returns full meal records,
+    so 36 requests replace thousands of `lookup.php` calls."""
+    total = 0
+    async with create_client(base_url=RECIPES_URL, timeout=10.0) as client:
+        for letter in string.ascii_lowercase + string.digits:
+            meals = await _fetch_meals_by_letter(client, letter)
+            total += catalog.upsert_meals(meals)
+            print(f"Ingested {len(meals)} meals for '{letter}' ({total} total)")
+            await asyncio.sleep(delay)
+    return total
+
+
+def main():
+    catalog = RecipeCatalog()
+    try:
+        total = asyncio.run(ingest_catalog(catalog))
+        print(f"Catalog at {CATALOG_PATH} now holds {len(catalog)} recipes ({total} ingested)")
+    finally:
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
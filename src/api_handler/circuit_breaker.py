@@ -0,0 +1,126 @@
+import time
+from collections import deque
+from typing import Any
+from urllib.parse import urlsplit
+
+from src.api_handler.constants import (CIRCUIT_WINDOW, CIRCUIT_MIN_CALLS, CIRCUIT_FAILURE_RATE,
+                                       CIRCUIT_SLOW_CALL_SECONDS, CIRCUIT_OPEN_SECONDS)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of sending a request to an upstream whose circuit is open."""
+
+    def __init__(self, host: str):
+        super().__init__(f"Circuit open for {host}")
+        self.host = host
+
+
+class CircuitBreaker:
+    """Failure-rate breaker for one upstream host, local to the process.
+
+    Closed: calls go through and their outcomes fill a window of the last `window` calls;
+    errors, 5xx/429 responses and calls slower than `slow_call` count as failures. Once
+    `min_calls` outcomes are in and the failure share reaches `failure_rate`, the circuit
+    opens and calls are refused for `open_seconds`. Then one probe call is let through
+    (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        window: int = CIRCUIT_WINDOW,
+        min_calls: int = CIRCUIT_MIN_CALLS,
+        failure_rate: float = CIRCUIT_FAILURE_RATE,
+        slow_call: float = CIRCUIT_SLOW_CALL_SECONDS,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS,
+    ):
+        self.host = host
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probing = False
+
+    def is_open(self) -> bool:
+        """True while calls would be refused; never starts a probe."""
+        if self.state == OPEN:
+            return time.monotonic() - self._opened_at < self.open_seconds
+        return self.state == HALF_OPEN and self._probing
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; claims the probe slot when the open period is over."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            self.state = HALF_OPEN
+            print(f"Circuit for {self.host} half-open, probing")
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record(self, success: bool, latency: float):
+        ok = success and latency <= self.slow_call
+        if self.state == HALF_OPEN:
+            self._probing = False
+            if ok:
+                self._close()
+            else:
+                self._open()
+            return
+        self._outcomes.append(ok)
+        failures = self._outcomes.count(False)
+        if (
+            self.state == CLOSED
+            and len(self._outcomes) >= self.min_calls
+            and failures >= self.failure_rate * len(self._outcomes)
+        ):
+            self._open()
+
+    def release(self):
+        """Give back the probe slot of a call that ended without an outcome (cancelled)."""
+        if self.state == HALF_OPEN:
+            self._probing = False
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        print(f"Circuit for {self.host} open, serving cached results for {self.open_seconds:.0f}s")
+
+    def _close(self):
+        self.state = CLOSED
+        self._outcomes.clear()
+        print(f"Circuit for {self.host} closed")
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    if host not in _breakers:
+        _breakers[host] = CircuitBreaker(host)
+    return _breakers[host]
+
+
+def breaker_for_url(url: str) -> CircuitBreaker:
+    return get_breaker(urlsplit(url).hostname or "")
+
+
+# tenacity hook: a failed attempt is not retried once its upstream's circuit is open,
+# so callers fall back to the cache instead of sleeping through the backoff schedule
+def stop_when_open(url: str):
+    breaker = breaker_for_url(url)
+
+    def _stop(retry_state: Any) -> bool:
+        return breaker.is_open()
+    return _stop
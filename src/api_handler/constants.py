@@ -1,6 +1,39 @@
+import os
+
 # TODO: Move to configs
 RECIPES_URL = "https://www.themealdb.com/api/json/v1/1"
 MAX_RECIPES = 500
 BATCH_SIZE = 5
+LOOKUP_RATE = 3.0
+LOOKUP_BURST = 3
+LOOKUP_CONCURRENCY = 4
+LOCAL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+LOCAL_CACHE_TTL = 300
+NEGATIVE_CACHE_TTL = 600
+CACHE_TTL_JITTER = 0.1
+RECIPES_CACHE_SOFT_TTL = 86400
+RECIPES_CACHE_TTL = 3 * 86400
+SINGLE_FLIGHT_LOCK_TTL = 120
+SINGLE_FLIGHT_POLL_INTERVAL = 0.2
+DEADLINE_RETRY_MARGIN = 5.0
+CATALOG_PATH = os.getenv("RECIPES_CATALOG_PATH", "data/mealdb_catalog.sqlite3")
+RECIPE_INDEX_MAX_RECIPES = 20000
+RECIPE_INDEX_MAX_TOKENS = 4096
+VOCABULARY_PATH = os.getenv("INGREDIENT_VOCABULARY_PATH", "data/ingredient_vocabulary.json")
+
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY = 30.0
+HTTP_PER_HOST_CONCURRENCY = 10
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+CIRCUIT_WINDOW = 20
+CIRCUIT_MIN_CALLS = 5
+CIRCUIT_FAILURE_RATE = 0.5
+CIRCUIT_SLOW_CALL_SECONDS = 5.0
+CIRCUIT_OPEN_SECONDS = 30.0
 
 NUTRITION_URL = "https://world.openfoodfacts.org/cgi/search.pl"
+NUTRITION_DB_PATH = os.getenv("NUTRITION_DB_PATH", "data/nutrition.sqlite3")
+NUTRITION_MIN_MATCH_SCORE = 0.5
+NUTRITION_MATCH_CANDIDATES = 500
+NUTRITION_HTTP_FALLBACK = os.getenv("NUTRITION_HTTP_FALLBACK", "true").lower() == "true"
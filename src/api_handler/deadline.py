@@ -0,0 +1,75 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable
+
+from src.api_handler.constants import DEADLINE_RETRY_MARGIN
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline:
+    """Absolute time budget of one request, carried as `configurable["deadline"]`."""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self, margin: float = 0.0) -> bool:
+        return self.remaining() <= margin
+
+    def timeout(self, cap: float | None = None) -> float:
+        """Seconds left, capped at `cap`; raises once nothing is left."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("Request deadline exceeded")
+        return remaining if cap is None else min(cap, remaining)
+
+
+_current: ContextVar[Deadline | None] = ContextVar("deadline", default=None)
+
+
+def deadline_from_config(config: Any) -> Deadline | None:
+    configurable = config.get("configurable", {}) if config else {}
+    return configurable.get("deadline")
+
+
+def current_deadline() -> Deadline | None:
+    return _current.get()
+
+
+@contextmanager
+def use_deadline(deadline: Deadline | None):
+    """Make `deadline` visible to the API clients for the calls made inside the block,
+    including tasks they spawn."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def request_timeout(default: float) -> float:
+    deadline = current_deadline()
+    return default if deadline is None else deadline.timeout(default)
+
+
+# tenacity hooks: no retry is started without DEADLINE_RETRY_MARGIN seconds left,
+# and backoff sleeps never run past that point
+def stop_at_deadline(retry_state: Any) -> bool:
+    deadline = current_deadline()
+    return deadline is not None and deadline.expired(DEADLINE_RETRY_MARGIN)
+
+
+def wait_within_deadline(wait: Callable[[Any], float]) -> Callable[[Any], float]:
+    def _wait(retry_state: Any) -> float:
+        seconds = wait(retry_state)
+        deadline = current_deadline()
+        if deadline is None:
+            return seconds
+        return max(0.0, min(seconds, deadline.remaining() - DEADLINE_RETRY_MARGIN))
+    return _wait
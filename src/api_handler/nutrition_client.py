@@ -1,32 +1,125 @@
-import re
+import asyncio
+from functools import partial
 import httpx
 from redis.asyncio import Redis
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
 
 from src.api_handler.constants import NUTRITION_URL
-from src.api_handler.cache import redis_cache
+from src.api_handler.nutrition_db import NutritionDatabase
+from src.api_handler.transport import create_client
+from src.api_handler.circuit_breaker import CircuitOpen, stop_when_open
+from src.api_handler.deadline import (DeadlineExceeded, request_timeout, stop_at_deadline,
+                                      wait_within_deadline)
+from src.api_handler.vocabulary import canonical_ingredient
+from src.api_handler.cache import (redis_cache, make_cache_key, cache_get_many_with_ttl, cache_set,
+                                   cache_set_many, is_stale, refresh_in_background, MISSING)
+
+NUTRITION_CACHE_PREFIX = "nutrition"
+NUTRITION_CACHE_SOFT_TTL = 86400
+NUTRITION_CACHE_TTL = 7 * 86400
+NUTRITION_NEGATIVE_TTL = 3600
 
 
 class NutritionAPIClient:
     base_url = NUTRITION_URL
 
-    def __init__(self, redis: Redis | None = None):
+    def __init__(
+        self,
+        redis: Redis | None = None,
+        nutrition_db: NutritionDatabase | None = None,
+        http_fallback: bool = True,
+    ):
         self._redis = redis
-        self._client = httpx.AsyncClient(timeout=2)
+        self._nutrition_db = nutrition_db
+        self.http_fallback = http_fallback
+        self._client = create_client(timeout=2)
 
     async def close(self):
         await self._client.aclose()
 
-    @staticmethod
-    def normalize_name(name: str) -> str:
-        name = name.lower()
-        name = re.sub(r"[^\w\s]", " ", name)
-        name = re.sub(r"\s+", " ", name).strip()
-        return name
-
-    @redis_cache(prefix="nutrition", ttl=86400)
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=15))
     async def get_nutrition(self, ingredient_name: str) -> None | dict:
+        ingredient_name = canonical_ingredient(ingredient_name)
+        if not ingredient_name:
+            return None
+        if self._nutrition_db is not None:
+            local = await asyncio.to_thread(self._nutrition_db.match, ingredient_name)
+            if local is not None:
+                return local
+        if not self.http_fallback:
+            return None
+        try:
+            return await self._get_remote_nutrition(ingredient_name)
+        except CircuitOpen:
+            return None
+
+    async def get_nutrition_many(self, ingredient_names: list[str]) -> dict[str, None | dict]:
+        """Nutrition per requested name; spellings of one ingredient share a single lookup."""
+        keys = {name: canonical_ingredient(name) for name in ingredient_names}
+        unique = list(dict.fromkeys(key for key in keys.values() if key))
+        result: dict[str, None | dict] = {}
+        if self._nutrition_db is not None:
+            # SQLite lookups block, one thread hop for the whole list
+            result = await asyncio.to_thread(self._nutrition_db.match_many, unique)
+        remaining = [key for key in unique if result.get(key) is None]
+        if self.http_fallback and remaining:
+            result.update(await self._get_remote_nutrition_many(remaining))
+        return {name: result.get(key) for name, key in keys.items()}
+
+    @redis_cache(
+        prefix=NUTRITION_CACHE_PREFIX,
+        ttl=NUTRITION_CACHE_TTL,
+        soft_ttl=NUTRITION_CACHE_SOFT_TTL,
+        negative_ttl=NUTRITION_NEGATIVE_TTL,
+    )
+    async def _get_remote_nutrition(self, ingredient_name: str) -> None | dict:
+        return await self._fetch_nutrition(ingredient_name)
+
+    async def _get_remote_nutrition_many(self, ingredient_names: list[str]) -> dict[str, None | dict]:
+        # same keys as _get_remote_nutrition: one MGET for all names, one pipeline for the fresh ones
+        keys = [make_cache_key(NUTRITION_CACHE_PREFIX, name) for name in ingredient_names]
+        cached, remaining = await cache_get_many_with_ttl(self._redis, keys, default=MISSING)
+        result = dict(zip(ingredient_names, cached))
+
+        for name, key, value, key_ttl in zip(ingredient_names, keys, cached, remaining):
+            if value is not MISSING and is_stale(
+                value, key_ttl, NUTRITION_CACHE_TTL, NUTRITION_CACHE_SOFT_TTL
+            ):
+                refresh_in_background(self._redis, key, partial(self._refresh_nutrition, name))
+
+        misses = [name for name, value in result.items() if value is MISSING]
+        fetched = await asyncio.gather(
+            *[self._fetch_nutrition(name) for name in misses], return_exceptions=True
+        )
+        to_cache, not_found = {}, {}
+        for name, value in zip(misses, fetched):
+            if isinstance(value, BaseException):
+                print(f"Error fetching nutrition for {name}: {value}")
+                result[name] = None
+                continue
+            result[name] = value
+            key = make_cache_key(NUTRITION_CACHE_PREFIX, name)
+            if value is not None:
+                to_cache[key] = value
+            else:
+                not_found[key] = None
+        await cache_set_many(self._redis, to_cache, ttl=NUTRITION_CACHE_TTL)
+        await cache_set_many(self._redis, not_found, ttl=NUTRITION_NEGATIVE_TTL)
+        return result
+
+    async def _refresh_nutrition(self, ingredient_name: str) -> None | dict:
+        value = await self._fetch_nutrition(ingredient_name)
+        ttl = NUTRITION_CACHE_TTL if value is not None else NUTRITION_NEGATIVE_TTL
+        await cache_set(
+            self._redis, make_cache_key(NUTRITION_CACHE_PREFIX, ingredient_name), value, ttl=ttl
+        )
+        return value
+
+    @retry(
+        retry=retry_if_not_exception_type(CircuitOpen),
+        stop=stop_after_attempt(3) | stop_at_deadline | stop_when_open(NUTRITION_URL),
+        wait=wait_within_deadline(wait_exponential(multiplier=1, min=4, max=15)),
+    )
+    async def _fetch_nutrition(self, ingredient_name: str) -> None | dict:
         params = {
             "search_terms": ingredient_name,
             "search_simple": 1,
@@ -35,7 +128,7 @@ class NutritionAPIClient:
             "page_size": 1,
         }
         try:
-            resp = await self._client.get(self.base_url, params=params)
+            resp = await self._client.get(self.base_url, params=params, timeout=request_timeout(2))
             resp.raise_for_status()
             data = resp.json()
             products = data.get("products", [])
@@ -49,7 +142,7 @@ class NutritionAPIClient:
                         "brands": product.get("brands"),
                         "url": product.get("url"),
                     }
-        except httpx.HTTPStatusError:
+        except (httpx.HTTPStatusError, DeadlineExceeded, CircuitOpen):
             raise
         except Exception:
             return None
@@ -0,0 +1,251 @@
+import argparse
+import csv
+import math
+import sqlite3
+import sys
+from collections import Counter
+from pathlib import Path
+
+from src.api_handler.constants import (NUTRITION_DB_PATH, NUTRITION_MIN_MATCH_SCORE,
+                                       NUTRITION_MATCH_CANDIDATES)
+from src.api_handler.vocabulary import TOKENIZER_VERSION, canonical_tokens
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS foods (
+    name_norm TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    calories_per_100g REAL NOT NULL,
+    brands TEXT,
+    url TEXT
+);
+
+CREATE TABLE IF NOT EXISTS food_tokens (
+    token TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    food_id INTEGER NOT NULL,
+    PRIMARY KEY (token, size, food_id)
+) WITHOUT ROWID;
+"""
+
+
+class NutritionDatabase:
+    """Local calorie table with a token index for fuzzy name matching.
+
+    Nothing is loaded into memory. `match` looks the canonical name up by primary key and
+    otherwise scores foods sharing a token with the query by Jaccard similarity, reading at
+    most `max_candidates` index entries per query token and name length. Queries block, so async
+    callers run them in a thread.
+    """
+
+    def __init__(
+        self,
+        path: str = NUTRITION_DB_PATH,
+        min_score: float = NUTRITION_MIN_MATCH_SCORE,
+        max_candidates: int = NUTRITION_MATCH_CANDIDATES,
+    ):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self.min_score = min_score
+        self.max_candidates = max_candidates
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != TOKENIZER_VERSION:
+            self.reindex()
+
+    def close(self):
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM foods").fetchone()[0]
+
+    def _index(self, after_rowid: int):
+        rows = self._conn.execute(
+            "SELECT rowid, name_norm FROM foods WHERE rowid > ?", (after_rowid,)
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO food_tokens (token, size, food_id) VALUES (?, ?, ?)",
+            (
+                (token, len(tokens), food_id)
+                for food_id, name_norm in rows
+                for tokens in (set(name_norm.split()),)
+                for token in tokens
+            ),
+        )
+
+    def reindex(self):
+        """Recompute the canonical names and the token index after the tokenizer changed;
+        on a name collision the older row wins, as on import."""
+        with self._conn:
+            self._conn.execute("ALTER TABLE foods RENAME TO foods_old")
+            self._conn.execute("DELETE FROM food_tokens")
+            self._conn.execute(SCHEMA.split(";")[0])
+            rows = self._conn.execute(
+                "SELECT name, calories_per_100g, brands, url FROM foods_old ORDER BY rowid"
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO foods (name_norm, name, calories_per_100g, brands, url) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    (" ".join(tokens), name, calories, brands, url)
+                    for name, calories, brands, url in rows
+                    if (tokens := canonical_tokens(name))
+                ),
+            )
+            self._conn.execute("DROP TABLE foods_old")
+            self._index(0)
+            self._conn.execute(f"PRAGMA user_version = {TOKENIZER_VERSION}")
+        count = len(self)
+        if count:
+            print(f"Reindexed {count} foods")
+
+    def import_rows(self, rows: list[tuple[str, float, str | None, str | None]]) -> int:
+        """Insert (name, calories_per_100g, brands, url) rows; the first row per name wins."""
+        with self._conn:
+            # rowids only grow, so the rows inserted here are the ones above the old maximum
+            last = self._conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM foods").fetchone()[0]
+            inserted = self._conn.executemany(
+                "INSERT OR IGNORE INTO foods (name_norm, name, calories_per_100g, brands, url) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (" ".join(canonical_tokens(name)), name, calories, brands, url)
+                    for name, calories, brands, url in rows
+                    if canonical_tokens(name)
+                ],
+            ).rowcount
+            self._index(last)
+        return inserted
+
+    def _best_of_size(self, tokens: list[str], size: int) -> tuple[int, int] | None:
+        """(food_id, shared tokens) of the food of `size` tokens sharing most of `tokens`.
+
+        Candidates are the first `max_candidates` index entries of each token; a food only
+        listed under very common tokens can be missed, but shared counts are exact.
+        """
+        postings = {
+            token: {row[0] for row in self._conn.execute(
+                "SELECT food_id FROM food_tokens WHERE token = ? AND size = ? LIMIT ?",
+                (token, size, self.max_candidates),
+            )}
+            for token in tokens
+        }
+        candidates = set().union(*postings.values())
+        for token, ids in postings.items():
+            missing = list(candidates - ids)
+            if len(ids) < self.max_candidates or not missing:
+                continue
+            # truncated list: probe the primary key for the other candidates
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                ids.update(row[0] for row in self._conn.execute(
+                    "SELECT food_id FROM food_tokens WHERE token = ? AND size = ? "
+                    f"AND food_id IN ({','.join('?' * len(chunk))})",
+                    (token, size, *chunk),
+                ))
+        if not candidates:
+            return None
+        shared = Counter(food_id for ids in postings.values() for food_id in ids)
+        # most shared tokens, then the oldest row, as with the first-row-wins import
+        return min(shared.items(), key=lambda item: (-item[1], item[0]))
+
+    def match(self, ingredient_name: str) -> None | dict:
+        key = " ".join(canonical_tokens(ingredient_name))
+        if not key:
+            return None
+        tokens = sorted(set(key.split()))
+        row = self._conn.execute("SELECT rowid FROM foods WHERE name_norm = ?", (key,)).fetchone()
+        best = row[0] if row else None
+        if best is None:
+            q = len(tokens)
+            # names of n tokens score at most min(q, n) / max(q, n): try the sizes in that
+            # order and stop once no size left can beat the best match
+            sizes = range(math.ceil(q * self.min_score), math.floor(q / self.min_score) + 1)
+            best_score = 0.0
+            for n in sorted(filter(None, sizes), key=lambda n: (-min(q, n) / max(q, n), n)):
+                if min(q, n) / max(q, n) <= best_score:
+                    break
+                found = self._best_of_size(tokens, n)
+                if found is None:
+                    continue
+                food_id, shared = found
+                # Jaccard; at equal scores the shorter, more generic name was tried first
+                score = shared / (q + n - shared)
+                if score > best_score:
+                    best, best_score = food_id, score
+            if best is None or best_score < self.min_score:
+                return None
+        name, calories, brands, url = self._conn.execute(
+            "SELECT name, calories_per_100g, brands, url FROM foods WHERE rowid = ?", (best,)
+        ).fetchone()
+        return {
+            "calories_per_100g": calories,
+            "product_name": name,
+            "brands": brands,
+            "url": url,
+        }
+
+    def match_many(self, ingredient_names: list[str]) -> dict[str, None | dict]:
+        return {name: self.match(name) for name in ingredient_names}
+
+
+def read_export(
+    path: str,
+    name_column: str,
+    calories_column: str,
+    brands_column: str | None = None,
+    url_column: str | None = None,
+    delimiter: str | None = None,
+):
+    csv.field_size_limit(sys.maxsize)
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        if delimiter is None:
+            delimiter = "\t" if "\t" in f.readline() else ","
+            f.seek(0)
+        for row in csv.DictReader(f, delimiter=delimiter):
+            name = (row.get(name_column) or "").strip()
+            try:
+                calories = float(row.get(calories_column) or "")
+            except ValueError:
+                continue
+            if not name or calories < 0:
+                continue
+            brands = (row.get(brands_column) or "").strip() or None if brands_column else None
+            url = (row.get(url_column) or "").strip() or None if url_column else None
+            yield name, calories, brands, url
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Import a nutrition export (CSV/TSV) into the local nutrition database. "
+                    "Defaults match the OpenFoodFacts products CSV export."
+    )
+    parser.add_argument("path")
+    parser.add_argument("--name-column", default="product_name")
+    parser.add_argument("--calories-column", default="energy-kcal_100g")
+    parser.add_argument("--brands-column", default="brands")
+    parser.add_argument("--url-column", default="url")
+    parser.add_argument("--delimiter", default=None)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    db = NutritionDatabase()
+    try:
+        total = 0
+        batch = []
+        rows = read_export(
+            args.path, args.name_column, args.calories_column,
+            args.brands_column, args.url_column, args.delimiter,
+        )
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= args.batch_size:
+                total += db.import_rows(batch)
+                batch = []
+                print(f"Imported {total} foods")
+        total += db.import_rows(batch)
+        print(f"Imported {total} foods into {NUTRITION_DB_PATH}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
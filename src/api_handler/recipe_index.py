@@ -0,0 +1,155 @@
+from collections import OrderedDict
+from typing import NamedTuple
+
+from src.api_handler.constants import RECIPE_INDEX_MAX_RECIPES, RECIPE_INDEX_MAX_TOKENS
+from src.api_handler.datamodels import Recipe
+from src.api_handler.vocabulary import canonical_tokens, canonical_ingredient
+
+
+class IndexedRecipe(NamedTuple):
+    names: tuple[str, ...]
+    lines: tuple[int, ...]
+    tokens: int
+
+
+def _matches(entry: IndexedRecipe, term: int) -> bool:
+    # a term matches when all of its tokens sit on one ingredient line
+    if not term or entry.tokens & term != term:
+        return False
+    if term & (term - 1) == 0:
+        return True
+    return any(line & term == term for line in entry.lines)
+
+
+class RecipeIndex:
+    """Ingredient lines of each recipe as bitmasks over a shared token-ID table.
+
+    Recipes are indexed when they are ingested into the catalog or fetched into the cache,
+    and otherwise the first time they are scored; entries live in an LRU bounded by
+    `max_recipes`, and matching a canonical term is then a few integer ANDs. Entries are
+    keyed by recipe id and rebuilt if the recipe's ingredient names change. Once the token
+    table outgrows `max_tokens`, token ids are reassigned from the live entries so tokens of
+    evicted recipes do not keep widening the masks.
+    """
+
+    def __init__(
+        self, max_recipes: int = RECIPE_INDEX_MAX_RECIPES, max_tokens: int = RECIPE_INDEX_MAX_TOKENS
+    ):
+        self.max_recipes = max_recipes
+        self.max_tokens = max_tokens
+        self._compact_at = max_tokens
+        self._token_ids: dict[str, int] = {}
+        self._entries: OrderedDict[str, IndexedRecipe] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def token_count(self) -> int:
+        return len(self._token_ids)
+
+    def mask(self, tokens: list[str]) -> int:
+        mask = 0
+        for token in tokens:
+            token_id = self._token_ids.setdefault(token, len(self._token_ids))
+            mask |= 1 << token_id
+        return mask
+
+    def term_mask(self, term: str) -> int:
+        """Mask of a canonical ingredient key, e.g. "chicken breast"; 0 when no indexed
+        recipe has one of its tokens, so query terms never grow the token table."""
+        mask = 0
+        for token in term.split():
+            token_id = self._token_ids.get(token)
+            if token_id is None:
+                return 0
+            mask |= 1 << token_id
+        return mask
+
+    def _entry(self, ingredient_names: list[str]) -> IndexedRecipe:
+        lines = tuple(self.mask(canonical_tokens(name)) for name in ingredient_names)
+        tokens = 0
+        for line in lines:
+            tokens |= line
+        return IndexedRecipe(tuple(ingredient_names), lines, tokens)
+
+    def _compact(self):
+        entries = list(self._entries.items())
+        self._token_ids = {}
+        self._entries = OrderedDict(
+            (recipe_id, self._entry(list(entry.names))) for recipe_id, entry in entries
+        )
+        # if the live recipes alone need most of the table, wait for it to double again
+        self._compact_at = max(self.max_tokens, 2 * len(self._token_ids))
+
+    def add(self, recipe_id: str, ingredient_names: list[str]) -> IndexedRecipe:
+        self._entries[recipe_id] = self._entry(ingredient_names)
+        self._entries.move_to_end(recipe_id)
+        while len(self._entries) > self.max_recipes:
+            self._entries.popitem(last=False)
+        if len(self._token_ids) > self._compact_at:
+            self._compact()
+        return self._entries[recipe_id]
+
+    def add_record(self, record: dict) -> IndexedRecipe:
+        """Index a stored recipe record (`Recipe.model_dump()` shape)."""
+        return self.add(record["id"], [ing["name"] for ing in record["ingredients"]])
+
+    def get(self, recipe: Recipe) -> IndexedRecipe:
+        names = [ing.name for ing in recipe.ingredients]
+        entry = self._entries.get(recipe.id)
+        if entry is None or entry.names != tuple(names):
+            return self.add(recipe.id, names)
+        self._entries.move_to_end(recipe.id)
+        return entry
+
+    def mentions(self, recipe: Recipe, terms: list[str]) -> list[bool]:
+        entry = self.get(recipe)
+        return [_matches(entry, self.term_mask(term)) for term in terms]
+
+    def violations(
+        self, recipe: Recipe, terms: list[str], exempt: dict[str, list[str]] | None = None
+    ) -> list[str]:
+        """Terms matching one of the recipe's ingredient lines, ignoring lines that also match
+        one of the term's `exempt` phrases ("coconut milk" for "milk")."""
+        entry = self.get(recipe)
+        found = []
+        for term in terms:
+            mask = self.term_mask(term)
+            if not _matches(entry, mask):
+                continue
+            exempt_masks = [
+                m for m in (self.term_mask(canonical_ingredient(p))
+                            for p in (exempt or {}).get(term, [])) if m
+            ]
+            if any(
+                line & mask == mask and not any(line & m == m for m in exempt_masks)
+                for line in entry.lines
+            ):
+                found.append(term)
+        return found
+
+    def rank(self, recipes: list[Recipe], include: list[str], exclude: list[str]) -> list[Recipe]:
+        """Drop recipes mentioning an excluded term and order the rest by: has the anchor
+        (first include term), matches every include term, include matches, fewest ingredients.
+
+        Terms are canonical keys; each is turned into a mask once per call.
+        """
+        entries = [self.get(recipe) for recipe in recipes]
+        include_masks = [self.term_mask(term) for term in include]
+        exclude_masks = [self.term_mask(term) for term in exclude]
+        scored = []
+        for recipe, entry in zip(recipes, entries):
+            if any(_matches(entry, term) for term in exclude_masks):
+                continue
+            hits = [_matches(entry, term) for term in include_masks]
+            count = sum(hits)
+            has_anchor = hits[0] if hits else True
+            scored.append(
+                ((not has_anchor, count != len(hits), -count, len(entry.lines)), recipe)
+            )
+        scored.sort(key=lambda x: x[0])
+        return [recipe for _, recipe in scored]
+
+
+recipe_index = RecipeIndex()
@@ -1,155 +1,313 @@
-import httpx
 import asyncio
+from collections import Counter
+from functools import partial
+from typing import AsyncIterator, Callable
 from redis.asyncio import Redis
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
 
 from src.api_handler.datamodels import Recipe, RecipeSearchQuery
-from src.api_handler.constants import RECIPES_URL, MAX_RECIPES, BATCH_SIZE
-from src.api_handler.cache import redis_cache
-from src.api_handler.recipes_funcs import (map_mealdb_meal_to_recipe, 
-                                           recipe_has_anchor, 
-                                           recipe_has_excluded_ingredient, 
-                                           count_include_matches)
+from src.api_handler.constants import (RECIPES_URL, MAX_RECIPES, BATCH_SIZE,
+                                       LOOKUP_RATE, LOOKUP_BURST, LOOKUP_CONCURRENCY,
+                                       RECIPES_CACHE_TTL, RECIPES_CACHE_SOFT_TTL)
+from src.api_handler.cache import (redis_cache, redis_id_cache, make_cache_key, cache_get_many,
+                                   cache_set, coalesce)
+from src.api_handler.catalog import RecipeCatalog
+from src.api_handler.rate_limit import TokenBucket
+from src.api_handler.transport import create_client
+from src.api_handler.circuit_breaker import CircuitOpen, stop_when_open, breaker_for_url
+from src.api_handler.deadline import request_timeout, stop_at_deadline, wait_within_deadline
+from src.api_handler.vocabulary import get_vocabulary, canonical_area, canonical_query
+from src.api_handler.recipes_funcs import map_mealdb_meal_to_recipe
+from src.api_handler.recipe_index import recipe_index
+
+LOOKUP_PREFIX = "recipes:lookup"
 
 
 class RecipesAPIClient:
     base_url = RECIPES_URL
     max_recipes = MAX_RECIPES
     batch_size = BATCH_SIZE
-    _lookup_delay = 0.3
 
-    def __init__(self, redis: Redis | None = None):
+    def __init__(
+        self,
+        redis: Redis | None = None,
+        catalog: RecipeCatalog | None = None,
+        lookup_rate: float = LOOKUP_RATE,
+        lookup_concurrency: int = LOOKUP_CONCURRENCY,
+        lookup_window: int | None = None,
+    ):
         self._redis = redis
-        self._client = httpx.AsyncClient(
-            base_url=self.base_url,
-            timeout=10.0,
-        )
+        self._catalog = catalog
+        # shared by every search on this client, so parallel searches cannot
+        # multiply the request rate against lookup.php
+        self._lookup_limiter = TokenBucket(lookup_rate, LOOKUP_BURST)
+        self._lookup_slots = asyncio.Semaphore(lookup_concurrency)
+        # candidate IDs looked up together per step of iter_search; default max(limit, batch)
+        self._lookup_window = lookup_window
+        self._client = create_client(base_url=self.base_url, timeout=10.0)
 
     async def close(self):
         await self._client.aclose()
 
-    @redis_cache(prefix="recipes:lookup", ttl=86400)
-    @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=2, max=30))
-    async def _lookup_by_id(self, meal_id: str) -> dict | None:
-        r = await self._client.get("/lookup.php", params={"i": meal_id})
+    @retry(
+        retry=retry_if_not_exception_type(CircuitOpen),
+        stop=stop_after_attempt(5) | stop_at_deadline | stop_when_open(RECIPES_URL),
+        wait=wait_within_deadline(wait_exponential(multiplier=1, min=2, max=30)),
+    )
+    async def _fetch_by_id(self, meal_id: str) -> dict | None:
+        async with self._lookup_slots:
+            await self._lookup_limiter.acquire()
+            r = await self._client.get(
+                "/lookup.php", params={"i": meal_id}, timeout=request_timeout(10.0)
+            )
         r.raise_for_status()
         meals = r.json().get("meals")
         if meals:
             return map_mealdb_meal_to_recipe(meals[0]).model_dump()
         return None
 
-    @redis_cache(prefix="recipes:name", ttl=86400)
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=8, max=15))
+    @redis_id_cache(
+        prefix="recipes:name",
+        record_prefix=LOOKUP_PREFIX,
+        ttl=RECIPES_CACHE_TTL,
+        soft_ttl=RECIPES_CACHE_SOFT_TTL,
+    )
+    @retry(
+        retry=retry_if_not_exception_type(CircuitOpen),
+        stop=stop_after_attempt(3) | stop_at_deadline | stop_when_open(RECIPES_URL),
+        wait=wait_within_deadline(wait_exponential(multiplier=1, min=8, max=15)),
+    )
     async def _search_by_name(self, query: str) -> list[dict]:
-        resp = await self._client.get("/search.php", params={"s": query})
+        resp = await self._client.get(
+            "/search.php", params={"s": query}, timeout=request_timeout(10.0)
+        )
         resp.raise_for_status()
         data = resp.json()
         meals = data.get("meals") or []
         return [map_mealdb_meal_to_recipe(m).model_dump() for m in meals]
 
-    @redis_cache(prefix="recipes:ingredient", ttl=86400)
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=8, max=15))
-    async def _search_by_ingredient(self, ingredient: str) -> list[dict]:
-        resp = await self._client.get("/filter.php", params={"i": ingredient})
+    @redis_cache(
+        prefix="recipes:ingredient_ids",
+        ttl=RECIPES_CACHE_TTL,
+        soft_ttl=RECIPES_CACHE_SOFT_TTL,
+    )
+    @retry(
+        retry=retry_if_not_exception_type(CircuitOpen),
+        stop=stop_after_attempt(3) | stop_at_deadline | stop_when_open(RECIPES_URL),
+        wait=wait_within_deadline(wait_exponential(multiplier=1, min=8, max=15)),
+    )
+    async def _filter_by_ingredient(self, ingredient: str) -> list[str]:
+        # one canonical key can stand for several MealDB spellings ("Egg", "Eggs")
+        ids: dict[str, None] = {}
+        for name in get_vocabulary().names(ingredient):
+            resp = await self._client.get(
+                "/filter.php", params={"i": name}, timeout=request_timeout(10.0)
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            meals = data.get("meals") or []
+            ids.update((m["idMeal"], None) for m in meals)
+        return list(ids)
+
+    @redis_cache(
+        prefix="recipes:area_ids",
+        ttl=RECIPES_CACHE_TTL,
+        soft_ttl=RECIPES_CACHE_SOFT_TTL,
+    )
+    @retry(
+        retry=retry_if_not_exception_type(CircuitOpen),
+        stop=stop_after_attempt(3) | stop_at_deadline | stop_when_open(RECIPES_URL),
+        wait=wait_within_deadline(wait_exponential(multiplier=1, min=8, max=15)),
+    )
+    async def _filter_by_area(self, area: str) -> list[str]:
+        resp = await self._client.get(
+            "/filter.php", params={"a": area.title()}, timeout=request_timeout(10.0)
+        )
         resp.raise_for_status()
         data = resp.json()
         meals = data.get("meals") or []
+        return [m["idMeal"] for m in meals]
+
+    async def _lookup_local(self, ids: list[str]) -> tuple[dict[str, dict], list[str]]:
+        """Records found in the catalog or the cache (one MGET), and the ids still missing."""
+        # catalog queries are blocking SQLite calls, kept off the event loop
+        found: dict[str, dict] = (
+            await asyncio.to_thread(self._catalog.get_many, ids) if self._catalog else {}
+        )
 
-        ids = [m["idMeal"] for m in meals]
-        recipes: list[dict] = []
+        remaining = [i for i in ids if i not in found]
+        keys = [make_cache_key(LOOKUP_PREFIX, i) for i in remaining]
+        cached = await cache_get_many(self._redis, keys)
+        misses = []
+        for meal_id, recipe in zip(remaining, cached):
+            if recipe is not None:
+                found[meal_id] = recipe
+            else:
+                misses.append(meal_id)
+        return found, misses
 
-        for meal_id in ids[: self.max_recipes]:
-            recipe = await self._lookup_by_id(meal_id)
-            if recipe:
-                recipes.append(recipe)
-            await asyncio.sleep(self._lookup_delay)
+    async def _fetch_and_store(self, meal_id: str) -> dict | None:
+        recipe = await self._fetch_by_id(meal_id)
+        if recipe:
+            recipe_index.add_record(recipe)
+            await cache_set(
+                self._redis, make_cache_key(LOOKUP_PREFIX, meal_id), recipe, ttl=RECIPES_CACHE_TTL
+            )
+        return recipe
 
-        return recipes
+    async def _lookup_remote(self, meal_id: str) -> dict | None:
+        # overlapping searches (e.g. parallel tool calls) share in-flight lookups
+        return await coalesce(
+            make_cache_key(LOOKUP_PREFIX, meal_id), partial(self._fetch_and_store, meal_id)
+        )
 
-    @redis_cache(prefix="recipes:area", ttl=86400)
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=8, max=15))
-    async def _search_by_area(self, area: str) -> list[dict]:
-        resp = await self._client.get("/filter.php", params={"a": area})
-        resp.raise_for_status()
-        data = resp.json()
-        meals = data.get("meals") or []
+    # the _find_* and _*_ids methods take raw user input and canonicalize it, so every
+    # spelling of a term shares one cache entry
+    async def _find_by_name(self, query: str) -> list[dict]:
+        query = canonical_query(query)
+        if self._catalog:
+            recipes = await asyncio.to_thread(self._catalog.search_by_name, query)
+            if recipes:
+                return recipes
+        return await self._search_by_name(query)
 
-        ids = [m["idMeal"] for m in meals]
-        recipes: list[dict] = []
+    async def _ingredient_ids(self, ingredient: str) -> list[str]:
+        ingredient = get_vocabulary().canonical(ingredient)
+        if self._catalog:
+            ids = await asyncio.to_thread(self._catalog.ingredient_ids, ingredient)
+            if ids:
+                return ids[: self.max_recipes]
+        return (await self._filter_by_ingredient(ingredient))[: self.max_recipes]
 
-        for meal_id in ids[: self.max_recipes]:
-            recipe = await self._lookup_by_id(meal_id)
-            if recipe:
-                recipes.append(recipe)
-            await asyncio.sleep(self._lookup_delay)
+    async def _area_ids(self, area: str) -> list[str]:
+        area = canonical_area(area)
+        if self._catalog:
+            ids = await asyncio.to_thread(self._catalog.area_ids, area)
+            if ids:
+                return ids[: self.max_recipes]
+        return (await self._filter_by_area(area))[: self.max_recipes]
 
-        return recipes
+    async def _candidate_ids(self, area: str | None, include: list[str]) -> list[str]:
+        area_ids: list[str] = []
+        if area:
+            try:
+                area_ids = await self._area_ids(area)
+            except Exception as e:
+                print(f"Error searching by area: {e}")
+
+        id_lists: list[list[str]] = []
+        batch_size = self.batch_size
+        for i in range(0, len(include), batch_size):
+            batch = include[i:i + batch_size]
+            tasks = [self._ingredient_ids(ing) for ing in batch]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            for part in results:
+                if isinstance(part, BaseException):
+                    print(f"Error searching by ingredient: {part}")
+                    part = []
+                id_lists.append(part)
 
-    def _to_recipes(self, dicts: list[dict]) -> list[Recipe]:
-        return [Recipe(**d) for d in dicts]
+        # ids returned by the anchor's filter, then by more ingredient filters, are known
+        # to match more terms, so they are looked up first
+        hits: Counter[str] = Counter(i for ids in id_lists for i in ids)
+        anchor_ids = set(id_lists[0]) if id_lists else set()
+        candidates = list(dict.fromkeys([*area_ids, *hits]))
+        candidates.sort(key=lambda i: (bool(id_lists) and i not in anchor_ids, -hits[i]))
+        return candidates
 
-    async def search(self, query: RecipeSearchQuery) -> list[Recipe]:
+    async def iter_search(
+        self,
+        query: RecipeSearchQuery,
+        limit: int | None = None,
+        hint: Callable[[Recipe], bool] | None = None,
+    ) -> AsyncIterator[Recipe]:
+        """Yield candidates as their records resolve, until `limit` of them satisfy `hint`
+        (by default: mention every include term).
+
+        Excluded recipes are never yielded and yield order is not ranked, see `search`.
+        Lookups still in flight when the limit is reached are cancelled.
+        """
         if not query.is_valid():
             raise ValueError("Provide query_text, include_ingredients, or area")
 
-        candidates: list[Recipe] = []
+        limit = limit or self.max_recipes
+        vocabulary = get_vocabulary()
+        include = vocabulary.canonical_list(query.include_ingredients)
+        exclude = vocabulary.canonical_list(query.exclude_ingredients)
+        if hint is None:
+            def hint(recipe: Recipe) -> bool:
+                return all(recipe_index.mentions(recipe, include))
+
+        seen: set[str] = set()
+        accepted = 0
 
+        def admit(record: dict | None) -> Recipe | None:
+            if not record or record["id"] in seen:
+                return None
+            seen.add(record["id"])
+            recipe = Recipe(**record)
+            if exclude and any(recipe_index.mentions(recipe, exclude)):
+                return None
+            return recipe
+
+        records: list[dict] = []
         if query.query_text:
             try:
-                candidates.extend(self._to_recipes(await self._search_by_name(query.query_text)))
+                records = await self._find_by_name(query.query_text)
             except Exception as e:
                 print(f"Error searching by name: {e}")
+        for record in records:
+            recipe = admit(record)
+            if recipe:
+                yield recipe
+                accepted += hint(recipe)
+                if accepted >= limit:
+                    return
 
-        if query.area:
-            try:
-                candidates.extend(self._to_recipes(await self._search_by_area(query.area)))
-            except Exception as e:
-                print(f"Error searching by area: {e}")
+        candidates = [i for i in await self._candidate_ids(query.area, include) if i not in seen]
+        window = self._lookup_window or max(limit, self.batch_size)
+        for start in range(0, len(candidates), window):
+            chunk = candidates[start:start + window]
+            found, misses = await self._lookup_local(chunk)
+            for meal_id in chunk:
+                recipe = admit(found.get(meal_id))
+                if recipe:
+                    yield recipe
+                    accepted += hint(recipe)
+                    if accepted >= limit:
+                        return
 
-        if query.include_ingredients:
-            batch_size = self.batch_size
-            for i in range(0, len(query.include_ingredients), batch_size):
-                batch = query.include_ingredients[i:i + batch_size]
-                tasks = [self._search_by_ingredient(ing) for ing in batch]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                for part in results:
-                    if isinstance(part, BaseException):
-                        print(f"Error searching by ingredient: {part}")
+            if breaker_for_url(self.base_url).is_open():
+                # degraded mode: answer from the catalog and the cache only
+                continue
+            tasks = [asyncio.ensure_future(self._lookup_remote(i)) for i in misses]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    try:
+                        record = await next_done
+                    except CircuitOpen:
                         continue
-                    candidates.extend(self._to_recipes(part))
-
-        unique: dict[str, Recipe] = {}
-        for r in candidates:
-            unique[r.id] = r
-        recipes = list(unique.values())
-
-        exclude_set = {e.lower() for e in query.exclude_ingredients}
-        if exclude_set:
-            recipes = [
-                r for r in recipes
-                if not recipe_has_excluded_ingredient(r, exclude_set)
-            ]
-
-        include_set = {i.lower() for i in query.include_ingredients}
-        anchor = query.include_ingredients[0].lower() if query.include_ingredients else None
-
-        scored = []
-        for r in recipes:
-            match_count = count_include_matches(r, include_set)
-            has_anchor = recipe_has_anchor(r, anchor) if anchor else True
-            full_match = match_count == len(include_set)
-
-            scored.append((r, has_anchor, full_match, match_count))
-
-        scored.sort(
-            key=lambda x: (
-                not x[1],
-                not x[2],
-                -x[3],   
-                len(x[0].ingredients),
-            )
-        )
-
-        recipes = [x[0] for x in scored]
+                    except Exception as e:
+                        print(f"Error looking up recipe: {e}")
+                        continue
+                    recipe = admit(record)
+                    if recipe:
+                        yield recipe
+                        accepted += hint(recipe)
+                        if accepted >= limit:
+                            return
+            finally:
+                for task in tasks:
+                    task.cancel()
 
-        return recipes[: self.max_recipes]
+    async def search(
+        self,
+        query: RecipeSearchQuery,
+        limit: int | None = None,
+        hint: Callable[[Recipe], bool] | None = None,
+    ) -> list[Recipe]:
+        limit = limit or self.max_recipes
+        recipes = [recipe async for recipe in self.iter_search(query, limit, hint)]
+        include = get_vocabulary().canonical_list(query.include_ingredients)
+        # tokenized once per recipe; scoring is integer mask tests
+        return recipe_index.rank(recipes, include, [])[:limit]
@@ -1,5 +1,5 @@
-import re
 from src.api_handler.datamodels import Recipe, IngredientRequirement
+from src.api_handler.recipe_index import recipe_index
 
 
 def map_mealdb_meal_to_recipe(meal: dict, max_ingredients: int = 20) -> Recipe:
@@ -26,48 +26,14 @@ def map_mealdb_meal_to_recipe(meal: dict, max_ingredients: int = 20) -> Recipe:
     )
 
 
-def normalize_ingredient_name(text: str) -> list[str]:
-    if not text:
-        return []
-
-    text = text.lower().strip()
-    text = re.sub(r"[^\w\s]", " ", text)
-
-    def singularize(word: str) -> str:
-        if word.endswith("ies"):
-            return word[:-3] + "y"
-        if word.endswith("es"):
-            return word[:-2]
-        if word.endswith("s") and len(word) > 3:
-            return word[:-1]
-        return word
-
-    return [singularize(w) for w in text.split()]
-
-
+# terms are canonical keys; multi-word ones ("chicken breast") match a single line
 def recipe_has_excluded_ingredient(recipe: Recipe, excluded: set[str]) -> bool:
-    for ing in recipe.ingredients:
-        tokens = normalize_ingredient_name(ing.name)
-        if any(ex in tokens for ex in excluded):
-            return True
-    return False
+    return any(recipe_index.mentions(recipe, list(excluded)))
 
 
 def count_include_matches(recipe: Recipe, include: set[str]) -> int:
-    matched = set()
-
-    for ing in recipe.ingredients:
-        tokens = normalize_ingredient_name(ing.name)
-        for inc in include:
-            if inc in tokens:
-                matched.add(inc)
-
-    return len(matched)
+    return sum(recipe_index.mentions(recipe, list(include)))
 
 
 def recipe_has_anchor(recipe: Recipe, anchor: str) -> bool:
-    for ing in recipe.ingredients:
-        tokens = normalize_ingredient_name(ing.name)
-        if anchor in tokens:
-            return True
-    return False
+    return recipe_index.mentions(recipe, [anchor])[0]
@@ -0,0 +1,138 @@
+import re
+
+from src.api_handler.datamodels import Recipe
+from src.api_handler.recipe_index import recipe_index
+from src.api_handler.vocabulary import get_vocabulary, tokenize
+
+MEAT = [
+    "beef", "veal", "pork", "bacon", "ham", "gammon", "pancetta", "prosciutto", "chorizo",
+    "salami", "pepperoni", "sausage", "lard", "lamb", "mutton", "goat", "venison", "rabbit",
+    "chicken", "turkey", "duck", "goose", "pheasant", "mince", "steak", "meat", "oxtail",
+    "liver", "kidney", "black pudding", "suet", "gelatine", "gelatin",
+]
+FISH = [
+    "fish", "salmon", "tuna", "cod", "haddock", "hake", "pollock", "sole", "plaice",
+    "halibut", "mackerel", "herring", "kipper", "sardine", "anchovy", "trout", "tilapia",
+    "sea bass", "monkfish", "swordfish", "snapper", "bream", "eel", "caviar",
+]
+CRUSTACEANS = ["prawn", "shrimp", "crab", "lobster", "crayfish", "langoustine"]
+MOLLUSCS = [
+    "scallop", "mussel", "clam", "oyster", "cockle", "squid", "calamari", "octopus", "whelk",
+]
+DAIRY = [
+    "milk", "butter", "cheese", "cream", "yogurt", "ghee", "buttermilk", "whey", "paneer",
+    "parmesan", "mozzarella", "cheddar", "feta", "ricotta", "mascarpone", "brie", "gruyere",
+    "halloumi", "creme fraiche", "custard", "condensed milk",
+]
+GLUTEN = [
+    "flour", "wheat", "bread", "breadcrumb", "pasta", "spaghetti", "linguine", "fettuccine",
+    "tagliatelle", "penne", "macaroni", "lasagne", "noodle", "couscous", "bulgur",
+    "semolina", "barley", "rye", "spelt", "pastry", "tortilla", "pitta", "naan", "biscuit",
+    "soy sauce", "beer",
+]
+TREE_NUTS = [
+    "almond", "walnut", "cashew", "pecan", "pistachio", "hazelnut", "macadamia",
+    "brazil nut", "pine nut", "chestnut", "nut",
+]
+PORK = [
+    "pork", "bacon", "ham", "gammon", "pancetta", "prosciutto", "chorizo", "salami",
+    "pepperoni", "sausage", "lard",
+]
+ALCOHOL = [
+    "wine", "beer", "ale", "cider", "brandy", "cognac", "rum", "vodka", "gin", "whisky",
+    "whiskey", "sherry", "port", "vermouth", "sake", "mirin", "liqueur", "kirsch",
+]
+
+# canonical restriction phrase -> ingredient terms it excludes
+RESTRICTION_TERMS = {
+    "vegan": MEAT + FISH + CRUSTACEANS + MOLLUSCS + DAIRY + ["egg", "mayonnaise", "honey"],
+    "vegetarian": MEAT + FISH + CRUSTACEANS + MOLLUSCS + ["fish sauce"],
+    "pescatarian": MEAT,
+    "meat": MEAT,
+    "red meat": ["beef", "veal", "pork", "lamb", "mutton", "goat", "venison", "mince", "steak"],
+    "pork": PORK,
+    "beef": ["beef", "veal", "oxtail", "minced beef"],
+    "halal": PORK + ALCOHOL + ["gelatine", "gelatin"],
+    "kosher": PORK + CRUSTACEANS + MOLLUSCS,
+    "fish": FISH + ["fish sauce"],
+    "seafood": FISH + CRUSTACEANS + MOLLUSCS + ["fish sauce"],
+    "shellfish": CRUSTACEANS + MOLLUSCS,
+    "crustacean": CRUSTACEANS,
+    "mollusc": MOLLUSCS,
+    "dairy": DAIRY,
+    "lactose": DAIRY,
+    "milk": DAIRY,
+    "cheese": ["cheese", "parmesan", "mozzarella", "cheddar", "feta", "ricotta", "brie",
+               "gruyere", "halloumi", "mascarpone", "paneer"],
+    "gluten": GLUTEN,
+    "wheat": GLUTEN,
+    "celiac": GLUTEN,
+    "coeliac": GLUTEN,
+    "egg": ["egg", "mayonnaise"],
+    "nut": TREE_NUTS + ["peanut"],
+    "tree nut": TREE_NUTS,
+    "peanut": ["peanut", "groundnut"],
+    "soy": ["soy", "soya", "tofu", "edamame", "miso", "tempeh"],
+    "sesame": ["sesame", "tahini"],
+    "alcohol": ALCOHOL,
+}
+
+# ingredient lines that contain an excluded term but do not violate it
+EXEMPT = {
+    "milk": ["coconut milk", "almond milk", "soy milk", "soya milk", "oat milk", "rice milk"],
+    "butter": ["peanut butter", "almond butter", "cocoa butter", "butter bean"],
+    "cream": ["cream of tartar", "coconut cream"],
+    "flour": ["rice flour", "corn flour", "almond flour", "coconut flour", "gluten free flour"],
+    "noodle": ["rice noodle", "glass noodle"],
+    "kidney": ["kidney bean"],
+    "goat": ["goat cheese"],
+    "beef": ["beef tomato"],
+    "wine": ["wine vinegar"],
+    "cider": ["cider vinegar"],
+    "chestnut": ["water chestnut"],
+}
+
+# words around the restricted thing: "no peanuts", "gluten-free", "allergic to shellfish"
+FILLER = {
+    "no", "free", "non", "allergy", "allergic", "allergies", "to", "intolerance",
+    "intolerant", "without", "avoid", "avoids", "diet", "sensitivity", "strict", "only",
+    "product", "containing", "contain",
+}
+
+
+def _phrases(restrictions: list[str]) -> list[str]:
+    phrases = []
+    for restriction in restrictions:
+        for part in re.split(r",|/|&|;|\band\b|\bor\b", restriction.lower()):
+            tokens = [t for t in tokenize(part) if t not in FILLER]
+            if tokens:
+                phrases.append(" ".join(tokens))
+    return phrases
+
+
+def resolve_restrictions(restrictions: list[str]) -> tuple[list[str], list[str]]:
+    """Canonical ingredient terms excluded by `restrictions`, and the restrictions that could
+    not be mapped (neither in RESTRICTION_TERMS nor a known ingredient), which only the
+    critic can judge."""
+    vocabulary = get_vocabulary()
+    terms: dict[str, None] = {}
+    unresolved = []
+    for phrase in _phrases(restrictions):
+        if phrase in RESTRICTION_TERMS:
+            terms.update((vocabulary.canonical(term), None) for term in RESTRICTION_TERMS[phrase])
+        elif vocabulary.canonical(phrase) in vocabulary:
+            terms[vocabulary.canonical(phrase)] = None
+        else:
+            unresolved.append(phrase)
+    return list(terms), unresolved
+
+
+def violations(recipe: Recipe, terms: list[str]) -> list[str]:
+    """Terms in `terms` found on one of the recipe's ingredient lines."""
+    return recipe_index.violations(recipe, terms, EXEMPT)
+
+
+def filter_recipes(recipes: list[Recipe], terms: list[str]) -> list[Recipe]:
+    if not terms:
+        return list(recipes)
+    return [recipe for recipe in recipes if not violations(recipe, terms)]
@@ -0,0 +1,109 @@
+import json
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any
+
+# orjson and zstandard ship with the langchain/langgraph stack; fall back to the
+# standard library so the cache keeps working without them
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Versioned values start with MAGIC, which never starts a JSON document, followed by the
+# format version and a codec byte. Anything else is a legacy plain-JSON entry.
+MAGIC = b"\x00"
+VERSION = 1
+CODEC_RAW = b"r"
+CODEC_ZSTD = b"z"
+CODEC_ZLIB = b"d"
+COMPRESS_THRESHOLD = 1024
+
+
+class CacheSerializer(ABC):
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        ...
+
+    @abstractmethod
+    def loads(self, raw: bytes | str) -> Any:
+        ...
+
+
+class JsonSerializer(CacheSerializer):
+    """The original format: plain `json.dumps(..., default=str)`."""
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, default=str).encode()
+
+    def loads(self, raw: bytes | str) -> Any:
+        return json.loads(raw)
+
+
+class CompactSerializer(CacheSerializer):
+    """orjson, compressed with zstd (or zlib) above `threshold` bytes, behind a version header.
+
+    Reads legacy JSON entries too, so existing keys stay valid while they age out.
+    """
+
+    def __init__(self, threshold: int = COMPRESS_THRESHOLD, level: int = 3):
+        self.threshold = threshold
+        self.level = level
+        if zstandard is not None:
+            self._compressor = zstandard.ZstdCompressor(level=level)
+            self._decompressor = zstandard.ZstdDecompressor()
+
+    @staticmethod
+    def _encode_json(value: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(value, default=str).encode()
+
+    @staticmethod
+    def _decode_json(payload: bytes) -> Any:
+        if orjson is not None:
+            return orjson.loads(payload)
+        return json.loads(payload)
+
+    def dumps(self, value: Any) -> bytes:
+        payload = self._encode_json(value)
+        codec = CODEC_RAW
+        if len(payload) > self.threshold:
+            if zstandard is not None:
+                payload, codec = self._compressor.compress(payload), CODEC_ZSTD
+            else:
+                payload, codec = zlib.compress(payload, self.level), CODEC_ZLIB
+        return MAGIC + bytes([VERSION]) + codec + payload
+
+    def loads(self, raw: bytes | str) -> Any:
+        if isinstance(raw, str):
+            raw = raw.encode()
+        if not raw.startswith(MAGIC):
+            return self._decode_json(raw)
+        version, codec, payload = raw[1], raw[2:3], raw[3:]
+        if version != VERSION:
+            raise ValueError(f"Unsupported cache format version: {version}")
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise ValueError("zstandard is required to read this cache entry")
+            payload = self._decompressor.decompress(payload)
+        elif codec == CODEC_ZLIB:
+            payload = zlib.decompress(payload)
+        return self._decode_json(payload)
+
+
+_serializer: CacheSerializer = CompactSerializer()
+
+
+def get_serializer() -> CacheSerializer:
+    return _serializer
+
+
+def set_serializer(serializer: CacheSerializer):
+    global _serializer
+    _serializer = serializer
@@ -0,0 +1,96 @@
+import asyncio
+import importlib.util
+import time
+
+import httpx
+
+from src.api_handler.constants import (HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                                       HTTP_KEEPALIVE_EXPIRY, HTTP_PER_HOST_CONCURRENCY,
+                                       HTTP2_ENABLED)
+from src.api_handler.circuit_breaker import CircuitOpen, get_breaker
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """Connection-pooled transport shared by the API clients, with a per-host request cap
+    and a circuit breaker per host: while it is open requests fail with CircuitOpen at once.
+
+    Clients built on it must not close the pool: `aclose` is a no-op and `close_transport`
+    shuts it down once at process exit.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, per_host: int):
+        self._transport = transport
+        self._per_host = per_host
+        self._slots: dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._slots:
+            self._slots[host] = asyncio.Semaphore(self._per_host)
+        return self._slots[host]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # the slot covers the request up to the response headers; MealDB and
+        # OpenFoodFacts bodies are small and read right after
+        host = request.url.host
+        breaker = get_breaker(host)
+        if not breaker.allow():
+            raise CircuitOpen(host)
+        try:
+            async with self._semaphore(host):
+                # latency is measured after the slot is taken: our own queueing says
+                # nothing about the upstream
+                start = time.monotonic()
+                try:
+                    response = await self._transport.handle_async_request(request)
+                except Exception:
+                    breaker.record(False, time.monotonic() - start)
+                    raise
+        except BaseException:
+            # cancelled before an outcome, e.g. a search that already has enough results
+            breaker.release()
+            raise
+        failed = response.status_code >= 500 or response.status_code == 429
+        breaker.record(not failed, time.monotonic() - start)
+        return response
+
+    async def aclose(self):
+        pass
+
+    async def close_pool(self):
+        await self._transport.aclose()
+
+
+_transport: HostLimitedTransport | None = None
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def get_transport() -> HostLimitedTransport:
+    global _transport
+    if _transport is None:
+        _transport = HostLimitedTransport(
+            httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                ),
+                # HTTP/2 needs the optional h2 package (httpx[http2])
+                http2=HTTP2_ENABLED and http2_available(),
+            ),
+            per_host=HTTP_PER_HOST_CONCURRENCY,
+        )
+    return _transport
+
+
+def create_client(base_url: str = "", timeout: float = 10.0) -> httpx.AsyncClient:
+    return httpx.AsyncClient(base_url=base_url, timeout=timeout, transport=get_transport())
+
+
+async def close_transport():
+    global _transport
+    if _transport is not None:
+        await _transport.close_pool()
+        _transport = None
@@ -0,0 +1,234 @@
+import asyncio
+import json
+import re
+from pathlib import Path
+
+from src.api_handler.constants import RECIPES_URL, VOCABULARY_PATH
+from src.api_handler.transport import create_client, close_transport
+
+# bump when tokenize/canonical change so persisted token indexes get rebuilt
+TOKENIZER_VERSION = 2
+
+# words that look plural but are not
+INVARIANT = {
+    "asparagus", "couscous", "hummus", "molasses", "swiss", "bass", "grass", "floss",
+    "chips", "oats", "greens", "lemongrass",
+}
+
+# spelling variants, applied per token after singularizing
+TOKEN_ALIASES = {
+    "chili": "chilli", "chily": "chilli", "chilly": "chilli", "chile": "chilli",
+    "yoghurt": "yogurt", "mozarella": "mozzarella", "parmigiano": "parmesan",
+}
+
+# whole-ingredient aliases; targets are spelled the way MealDB lists the ingredient
+ALIASES = {
+    "scallions": "spring onions",
+    "green onions": "spring onions",
+    "garbanzo": "chickpeas",
+    "garbanzo beans": "chickpeas",
+    "eggplant": "aubergine",
+    "zucchini": "courgettes",
+    "cilantro": "coriander",
+    "arugula": "rocket",
+    "shrimp": "prawns",
+    "ground beef": "minced beef",
+    "beef mince": "minced beef",
+    "ground lamb": "lamb mince",
+    "minced lamb": "lamb mince",
+    "powdered sugar": "icing sugar",
+    "confectioners sugar": "icing sugar",
+    "all purpose flour": "plain flour",
+    "heavy cream": "double cream",
+    "light cream": "single cream",
+    "baking soda": "bicarbonate of soda",
+}
+
+AREA_ALIASES = {
+    "usa": "american", "us": "american", "america": "american",
+    "uk": "british", "england": "british", "english": "british",
+    "italy": "italian", "mexico": "mexican", "china": "chinese", "india": "indian",
+    "japan": "japanese", "france": "french", "thailand": "thai", "greece": "greek",
+    "spain": "spanish", "vietnam": "vietnamese", "morocco": "moroccan",
+}
+
+# dropped when the full name is not a known ingredient, so "fresh basil" shares "basil"'s key
+DESCRIPTORS = {
+    "fresh", "freshly", "chopped", "diced", "sliced", "large", "small", "medium", "organic",
+    "ripe", "raw", "whole", "boneless", "skinless", "finely", "roughly",
+}
+
+
+def singularize(word: str) -> str:
+    if word in INVARIANT or len(word) <= 3:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "sses", "xes", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    if not text:
+        return []
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    words = (singularize(w) for w in text.split())
+    return [TOKEN_ALIASES.get(w, w) for w in words]
+
+
+def canonical_area(area: str) -> str:
+    key = " ".join(area.lower().split())
+    return AREA_ALIASES.get(key, key)
+
+
+def canonical_query(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class IngredientVocabulary:
+    """Maps free-text ingredient names onto one canonical key per ingredient.
+
+    The key is the singularized, alias-resolved token string shared by cache keys, the
+    catalog and nutrition indexes and the search filters; `names` lists the MealDB
+    spellings behind a key (e.g. "Egg" and "Eggs") for filter calls.
+    """
+
+    def __init__(self, names: list[str] | None = None, aliases: dict[str, str] | None = None):
+        self.aliases = {
+            " ".join(tokenize(alias)): " ".join(tokenize(target))
+            for alias, target in {**ALIASES, **(aliases or {})}.items()
+        }
+        self._names: dict[str, list[str]] = {}
+        self._warned = False
+        for name in names or []:
+            spellings = self._names.setdefault(self._resolve(tokenize(name)), [])
+            if name not in spellings:
+                spellings.append(name)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._names
+
+    def _resolve(self, tokens: list[str]) -> str:
+        phrase = " ".join(tokens)
+        return self.aliases.get(phrase, phrase)
+
+    def keys(self) -> list[str]:
+        return list(self._names)
+
+    def canonical(self, name: str) -> str:
+        tokens = tokenize(name)
+        key = self._resolve(tokens)
+        if key in self._names:
+            return key
+        stripped = [t for t in tokens if t not in DESCRIPTORS]
+        if stripped and len(stripped) < len(tokens):
+            return self._resolve(stripped)
+        return key
+
+    def canonical_tokens(self, name: str) -> list[str]:
+        return self.canonical(name).split()
+
+    def canonical_list(self, names: list[str]) -> list[str]:
+        """Canonical keys in first-seen order, without duplicates or empty names."""
+        keys = (self.canonical(name) for name in names)
+        return list(dict.fromkeys(key for key in keys if key))
+
+    def names(self, key: str) -> list[str]:
+        if key in self._names:
+            return self._names[key]
+        if not self._names and not self._warned:
+            # one filter call per key either way; spellings that differ from the key
+            # (plurals) only match once the vocabulary is built
+            print("Ingredient vocabulary is empty, filtering by canonical keys only; "
+                  "run build_vocabulary or start the backend with a catalog")
+            self._warned = True
+        return [key]
+
+    @classmethod
+    def load(cls, path: str = VOCABULARY_PATH) -> "IngredientVocabulary":
+        if not Path(path).exists():
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("ingredients", []), data.get("aliases", {}))
+
+    def save(self, path: str = VOCABULARY_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        ingredients = [name for names in self._names.values() for name in names]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": TOKENIZER_VERSION, "ingredients": ingredients}, f, indent=1)
+
+
+_vocabulary: IngredientVocabulary | None = None
+
+
+def get_vocabulary() -> IngredientVocabulary:
+    global _vocabulary
+    if _vocabulary is None:
+        _vocabulary = IngredientVocabulary.load()
+    return _vocabulary
+
+
+def set_vocabulary(vocabulary: IngredientVocabulary):
+    global _vocabulary
+    _vocabulary = vocabulary
+
+
+def canonical_ingredient(name: str) -> str:
+    return get_vocabulary().canonical(name)
+
+
+def canonical_tokens(name: str) -> list[str]:
+    return get_vocabulary().canonical_tokens(name)
+
+
+async def fetch_mealdb_ingredients() -> list[str]:
+    async with create_client(base_url=RECIPES_URL, timeout=10.0) as client:
+        resp = await client.get("/list.php", params={"i": "list"})
+        resp.raise_for_status()
+        meals = resp.json().get("meals") or []
+    return [m["strIngredient"].strip() for m in meals if (m.get("strIngredient") or "").strip()]
+
+
+async def ensure_vocabulary(known_names: list[str] | None = None) -> IngredientVocabulary:
+    """Build and save the vocabulary if none was built yet, from `known_names` (e.g. the
+    catalog's ingredient names) or else from MealDB's ingredient list. Failures leave the
+    empty vocabulary in place."""
+    vocabulary = get_vocabulary()
+    if len(vocabulary):
+        return vocabulary
+    try:
+        names = known_names or await fetch_mealdb_ingredients()
+    except Exception as e:
+        print(f"Could not build the ingredient vocabulary: {e}")
+        return vocabulary
+    vocabulary = IngredientVocabulary(names)
+    await asyncio.to_thread(vocabulary.save)
+    set_vocabulary(vocabulary)
+    print(f"Built ingredient vocabulary of {len(vocabulary)} keys")
+    return vocabulary
+
+
+async def _build_vocabulary() -> list[str]:
+    try:
+        return await fetch_mealdb_ingredients()
+    finally:
+        await close_transport()
+
+
+def main():
+    names = asyncio.run(_build_vocabulary())
+    vocabulary = IngredientVocabulary(names)
+    vocabulary.save()
+    print(f"Saved {len(names)} MealDB ingredients as {len(vocabulary)} canonical keys "
+          f"to {VOCABULARY_PATH}")
+
+
+if __name__ == "__main__":
+    main()
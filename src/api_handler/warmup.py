@@ -0,0 +1,156 @@
+import asyncio
+import os
+import time
+from collections import Counter
+
+from redis.asyncio import Redis
+
+from src.api_handler.catalog import RecipeCatalog
+from src.api_handler.datamodels import RecipeSearchQuery
+from src.api_handler.recipes_client import RecipesAPIClient
+from src.api_handler.vocabulary import canonical_tokens, get_vocabulary
+from src.api_handler.transport import close_transport
+from src.database.crud import get_session, get_all_last_queries
+
+# spelled the way MealDB names them, so warmed keys match what searches ask for
+SEED_INGREDIENTS = [
+    "chicken", "beef", "pork", "lamb", "salmon", "prawns", "eggs", "rice", "pasta",
+    "potatoes", "tomatoes", "mushrooms", "cheese", "garlic", "onion", "carrots",
+    "spinach", "tofu", "chickpeas", "lentils", "honey", "bacon", "avocado", "coconut milk",
+]
+AREAS = [
+    "American", "British", "Canadian", "Chinese", "Croatian", "Dutch", "Egyptian", "Filipino",
+    "French", "Greek", "Indian", "Irish", "Italian", "Jamaican", "Japanese", "Kenyan",
+    "Malaysian", "Mexican", "Moroccan", "Polish", "Portuguese", "Russian", "Spanish", "Thai",
+    "Tunisian", "Turkish", "Ukrainian", "Vietnamese",
+]
+SEED_AREAS = ["Italian", "Mexican", "Chinese", "Indian", "British", "American"]
+
+MAX_INGREDIENTS = 30
+MAX_AREAS = 10
+WARMUP_CONCURRENCY = 2
+# warm-up runs on its own client, well under the live lookup rate, so user searches never
+# queue behind it on the upstream limiter. Lookups are shared per recipe ID (coalesce), so
+# it resolves one ID at a time: a user search needing the same record waits at most one
+# token interval. A few candidates per term cover the first page.
+WARMUP_LOOKUP_RATE = 1.0
+WARMUP_LOOKUP_CONCURRENCY = 1
+WARMUP_LOOKUP_WINDOW = 1
+WARMUP_SEARCH_LIMIT = 10
+
+
+def rank_terms(
+    queries: list[str], vocabulary: list[str], seeds: list[str], limit: int
+) -> list[str]:
+    """Vocabulary terms ordered by how often past queries mention them, topped up with seeds."""
+    by_tokens = {tuple(canonical_tokens(term)): term for term in vocabulary}
+    lengths = sorted({len(term_tokens) for term_tokens in by_tokens})
+    counts: Counter[str] = Counter()
+    for query in queries:
+        tokens = canonical_tokens(query)
+        mentioned = {
+            by_tokens[ngram]
+            for n in lengths
+            for ngram in (tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+            if ngram in by_tokens
+        }
+        counts.update(mentioned)
+    ranked = [term for term, _ in counts.most_common()]
+    return list(dict.fromkeys(ranked + seeds))[:limit]
+
+
+def load_last_queries() -> list[str]:
+    try:
+        with get_session() as session:
+            return get_all_last_queries(session)
+    except Exception as e:
+        print(f"[warm-up] could not read query history, using seeds only: {e}")
+        return []
+
+
+async def warm_up(
+    client: RecipesAPIClient,
+    ingredients: list[str],
+    areas: list[str],
+    concurrency: int = WARMUP_CONCURRENCY,
+    limit: int = WARMUP_SEARCH_LIMIT,
+) -> dict[str, int]:
+    """Run one search per term so the recipe caches hold them before users ask.
+
+    Lookups go through the client's rate limiter, so `client` should be a dedicated
+    low-rate one (see `warm_up_from_history`); `concurrency` bounds how many searches are
+    in flight on top of that, and `limit` how many recipes each search resolves.
+    """
+    queries = [
+        ("ingredient", ing, RecipeSearchQuery(include_ingredients=[ing])) for ing in ingredients
+    ]
+    queries += [("area", area, RecipeSearchQuery(area=area)) for area in areas]
+    semaphore = asyncio.Semaphore(concurrency)
+    done = 0
+    results: dict[str, int] = {}
+    start = time.perf_counter()
+
+    async def run(kind: str, term: str, query: RecipeSearchQuery):
+        nonlocal done
+        async with semaphore:
+            t = time.perf_counter()
+            try:
+                recipes = await client.search(query, limit=limit)
+                results[f"{kind}:{term}"] = len(recipes)
+                status = f"{len(recipes)} recipes"
+            except Exception as e:
+                status = f"failed: {e}"
+            done += 1
+            print(f"[warm-up] {done}/{len(queries)} {kind} '{term}': {status} "
+                  f"({time.perf_counter() - t:.1f}s)")
+
+    await asyncio.gather(*[run(*q) for q in queries])
+    print(f"[warm-up] finished {len(results)}/{len(queries)} searches "
+          f"in {time.perf_counter() - start:.1f}s")
+    return results
+
+
+async def warm_up_from_history(
+    redis: Redis | None,
+    catalog: RecipeCatalog | None = None,
+    max_ingredients: int = MAX_INGREDIENTS,
+    max_areas: int = MAX_AREAS,
+    concurrency: int = WARMUP_CONCURRENCY,
+) -> dict[str, int]:
+    queries = await asyncio.to_thread(load_last_queries)
+    # every known ingredient can rank, seeds only fill up what history does not cover
+    vocabulary = get_vocabulary()
+    seeds = vocabulary.canonical_list(SEED_INGREDIENTS)
+    ingredients = rank_terms(queries, vocabulary.keys() + seeds, seeds, max_ingredients)
+    areas = rank_terms(queries, AREAS, SEED_AREAS, max_areas)
+    # own client and limiter: the caches are shared, the upstream request budget is not
+    client = RecipesAPIClient(
+        redis=redis,
+        catalog=catalog,
+        lookup_rate=WARMUP_LOOKUP_RATE,
+        lookup_concurrency=WARMUP_LOOKUP_CONCURRENCY,
+        lookup_window=WARMUP_LOOKUP_WINDOW,
+    )
+    try:
+        return await warm_up(client, ingredients, areas, concurrency=concurrency)
+    finally:
+        await client.close()
+
+
+async def warm_up_run():
+    redis = Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+    catalog = RecipeCatalog()
+    try:
+        await warm_up_from_history(redis, catalog)
+    finally:
+        await close_transport()
+        await redis.close()
+        catalog.close()
+
+
+def main():
+    asyncio.run(warm_up_run())
+
+
+if __name__ == "__main__":
+    main()
@@ -34,6 +34,10 @@ def get_profile_by_user_login(session, login):
     stmt = select(UserProfile).join(User).where(User.login == login)
     return session.scalar(stmt)
 
+def get_all_last_queries(session) -> list[str]:
+    stmt = select(UserProfile.last_queries)
+    return [q for queries in session.scalars(stmt) for q in (queries or [])]
+
 def update_profile(session, user_id, last_queries=None, preferences=None, allergies=None):
     profile = get_profile_by_user_id(session, user_id)
     if not profile:
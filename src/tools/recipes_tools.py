@@ -4,8 +4,12 @@ from langchain_core.runnables import RunnableConfig
 from typing import List
 from pydantic import BaseModel, Field, model_validator
 from src.api_handler.datamodels import Recipe, RecipeSearchQuery
+from src.api_handler.deadline import deadline_from_config, use_deadline
 
 MAX_RECIPES = 10
+# the search stops once it has this many good candidates; the tools then sample
+# MAX_RECIPES of them so repeated calls do not always return the same recipes
+SEARCH_LIMIT = 3 * MAX_RECIPES
 
 
 class SearchRecipesByNameInput(BaseModel):
@@ -91,7 +95,8 @@ async def search_recipes_by_name(
     client = config.get("configurable", {}).get("recipes_client")
     if not client:
         raise ValueError("recipes_client not found in config")
-    recipes = await client.search(RecipeSearchQuery(query_text=query))
+    with use_deadline(deadline_from_config(config)):
+        recipes = await client.search(RecipeSearchQuery(query_text=query), limit=SEARCH_LIMIT)
     # select N random in order not to overload the LLM
     if len(recipes) > MAX_RECIPES:
         recipes = random.sample(recipes, MAX_RECIPES)
@@ -112,10 +117,11 @@ async def search_recipes_by_ingredient(
     client = config.get("configurable", {}).get("recipes_client")
     if not client:
         raise ValueError("recipes_client not found in config")
-    recipes = await client.search(RecipeSearchQuery(
-        include_ingredients=ingredient_include,
-        exclude_ingredients=ingredient_exclude or []
-    ))
+    with use_deadline(deadline_from_config(config)):
+        recipes = await client.search(RecipeSearchQuery(
+            include_ingredients=ingredient_include,
+            exclude_ingredients=ingredient_exclude or []
+        ), limit=SEARCH_LIMIT)
     # select N random in order not to overload the LLM
     if len(recipes) > MAX_RECIPES:
         recipes = random.sample(recipes, MAX_RECIPES)
@@ -135,10 +141,11 @@ async def search_recipes_by_area(
     client = config.get("configurable", {}).get("recipes_client")
     if not client:
         raise ValueError("recipes_client not found in config")
-    recipes = await client.search(RecipeSearchQuery(
-        area=area,
-        exclude_ingredients=ingredient_exclude or []
-    ))
+    with use_deadline(deadline_from_config(config)):
+        recipes = await client.search(RecipeSearchQuery(
+            area=area,
+            exclude_ingredients=ingredient_exclude or []
+        ), limit=SEARCH_LIMIT)
     # select N random in order not to overload the LLM
     if len(recipes) > MAX_RECIPES:
         recipes = random.sample(recipes, MAX_RECIPES)
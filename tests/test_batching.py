@@ -0,0 +1,61 @@
+from src.agent.batching import estimate_tokens, output_budget, pack_batches
+from src.agent.constants import BATCH_CHARS_PER_TOKEN, BATCH_REASONING_RESERVE
+
+# 10 tokens each, 11 with the separator
+ITEM = "x" * int(10 * BATCH_CHARS_PER_TOKEN)
+
+
+def pack(items, **budgets):
+    params = dict(
+        fixed_text="", output_per_item=1, output_fixed=0, max_output_tokens=1000,
+        max_input_tokens=1000, max_items=None,
+    )
+    params.update(budgets)
+    return pack_batches(items, str, **params)
+
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens(ITEM) == 10
+    assert estimate_tokens(ITEM + "x") == 11
+    assert estimate_tokens("") == 0
+
+
+def test_output_budget_reserves_reasoning_tokens():
+    assert output_budget(4096, reasoning=False) == 4096
+    assert output_budget(4096, reasoning=True) == 4096 - BATCH_REASONING_RESERVE
+
+
+def test_everything_fits_in_one_batch():
+    items = [f"{ITEM}{i}" for i in range(5)]
+    assert pack(items) == [items]
+
+
+def test_input_budget_splits_batches_in_order():
+    items = [ITEM] * 7
+    batches = pack(items, max_input_tokens=33)
+    assert [len(b) for b in batches] == [3, 3, 1]
+
+
+def test_fixed_text_counts_against_every_batch():
+    fixed = "y" * int(11 * BATCH_CHARS_PER_TOKEN)
+    batches = pack([ITEM] * 4, fixed_text=fixed, max_input_tokens=33)
+    assert [len(b) for b in batches] == [2, 2]
+
+
+def test_output_budget_splits_batches():
+    batches = pack([ITEM] * 5, output_per_item=10, output_fixed=5, max_output_tokens=25)
+    assert [len(b) for b in batches] == [2, 2, 1]
+
+
+def test_max_items_caps_batch_size():
+    assert [len(b) for b in pack([ITEM] * 5, max_items=2)] == [2, 2, 1]
+
+
+def test_oversized_item_gets_its_own_batch():
+    big = ITEM * 10
+    batches = pack([ITEM, big, ITEM], max_input_tokens=50)
+    assert batches == [[ITEM], [big], [ITEM]]
+
+
+def test_no_items():
+    assert pack([]) == []
@@ -0,0 +1,59 @@
+import pytest
+
+from src.api_handler.calories import estimate_recipe_calories, measure_to_grams
+from src.api_handler.datamodels import IngredientRequirement, Recipe
+
+
+@pytest.mark.parametrize(
+    "amount, ingredient, grams",
+    [
+        ("200g", "Plain Flour", 200.0),
+        ("1kg", "Potatoes", 1000.0),
+        ("2 tbsp", "Olive Oil", 2 * 15.0 * 0.92),
+        ("1 1/2 cups", "Milk", 1.5 * 240.0 * 1.03),
+        ("½ tsp", "Water", 2.5),
+        ("3", "Eggs", 150.0),
+        ("2 large", "Onions", 2 * 150.0 * 1.3),
+        ("2-3 cloves", "Garlic", 8.0),
+        ("Juice of 1", "Lemon", 30.0),
+        ("Zest of 2", "Orange", 4.0),
+        ("Zest and juice of 1", "Lime", 32.0),
+    ],
+)
+def test_measure_to_grams(amount, ingredient, grams):
+    assert measure_to_grams(amount, ingredient) == pytest.approx(grams)
+
+
+@pytest.mark.parametrize("amount", ["to taste", "Garnish", "pinch to serve"])
+def test_negligible_measures_weigh_nothing(amount):
+    assert measure_to_grams(amount, "Salt") == 0.0
+
+
+@pytest.mark.parametrize(
+    "amount, ingredient",
+    [(None, "Flour"), ("", "Flour"), ("some", "Flour"), ("2", "Mystery Paste")],
+)
+def test_unresolved_measures(amount, ingredient):
+    assert measure_to_grams(amount, ingredient) is None
+
+
+def test_estimate_recipe_calories_counts_resolved_ingredients():
+    recipe = Recipe(
+        id="1",
+        title="recipe",
+        ingredients=[
+            IngredientRequirement(name="Plain Flour", amount="200g", calories_per100g=364),
+            IngredientRequirement(name="Eggs", amount="2", calories_per100g=143),
+            IngredientRequirement(name="Water", amount="100ml"),
+            IngredientRequirement(name="Salt", amount="to taste"),
+            # no calorie value: not covered
+            IngredientRequirement(name="Sugar", amount="50g"),
+        ],
+    )
+    total, coverage = estimate_recipe_calories(recipe)
+    assert total == pytest.approx(2 * 364 + 100 * 1.43)
+    assert coverage == pytest.approx(4 / 5)
+
+
+def test_estimate_recipe_calories_without_ingredients():
+    assert estimate_recipe_calories(Recipe(id="1", title="recipe", ingredients=[])) == (0.0, 0.0)
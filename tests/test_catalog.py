@@ -0,0 +1,56 @@
+import pytest
+
+from src.api_handler.catalog import RecipeCatalog
+
+
+def make_meal(meal_id: str, title: str, area: str, *ingredients: str) -> dict:
+    meal = {"idMeal": meal_id, "strMeal": title, "strArea": area, "strInstructions": ""}
+    for i, name in enumerate(ingredients, start=1):
+        meal[f"strIngredient{i}"] = name
+        meal[f"strMeasure{i}"] = "1"
+    return meal
+
+
+@pytest.fixture
+def catalog():
+    catalog = RecipeCatalog(":memory:")
+    catalog.upsert_meals([
+        make_meal("1", "Chicken Curry", "Indian", "Chicken Breasts", "Onions", "Rice"),
+        make_meal("2", "Duck Salad", "Chinese", "Chicken Stock", "Duck Breast"),
+        make_meal("3", "Beef Stew", "British", "Beef", "Onion", "Carrots"),
+    ])
+    yield catalog
+    catalog.close()
+
+
+def test_ingredient_tokens_must_share_one_line(catalog):
+    assert catalog.ingredient_ids("chicken breast") == ["1"]
+    assert catalog.ingredient_ids("chicken") == ["1", "2"]
+
+
+def test_plural_spellings_share_an_index_entry(catalog):
+    assert catalog.ingredient_ids("onions") == ["3", "1"]
+    assert catalog.ingredient_ids("carrot") == ["3"]
+
+
+def test_area_ids_are_canonical(catalog):
+    assert catalog.area_ids("india") == ["1"]
+    assert catalog.area_ids("UK") == ["3"]
+    assert catalog.area_ids("French") == []
+
+
+def test_search_by_name_needs_every_token(catalog):
+    assert [r["id"] for r in catalog.search_by_name("curry chicken")] == ["1"]
+    assert catalog.search_by_name("chicken stew") == []
+
+
+def test_upsert_replaces_the_index_entries(catalog):
+    catalog.upsert_meals([make_meal("1", "Veggie Curry", "Indian", "Chickpeas", "Rice")])
+    assert len(catalog) == 3
+    assert catalog.ingredient_ids("chicken") == ["2"]
+    assert catalog.get_many(["1"])["1"]["title"] == "Veggie Curry"
+
+
+def test_ingredient_names_are_unique_in_order(catalog):
+    assert catalog.ingredient_names()[:3] == ["Chicken Breasts", "Onions", "Rice"]
+    assert len(catalog.ingredient_names()) == len(set(catalog.ingredient_names()))
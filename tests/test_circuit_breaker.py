@@ -0,0 +1,65 @@
+from src.api_handler.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def failing(breaker: CircuitBreaker, count: int):
+    for _ in range(count):
+        breaker.record(False, 0.1)
+
+
+def test_opens_at_the_failure_rate_after_min_calls():
+    breaker = CircuitBreaker("host", window=10, min_calls=4, failure_rate=0.5)
+    failing(breaker, 3)
+    assert breaker.state == CLOSED
+    breaker.record(True, 0.1)
+    assert breaker.state == OPEN
+    assert breaker.is_open()
+    assert not breaker.allow()
+
+
+def test_successes_keep_it_closed():
+    breaker = CircuitBreaker("host", window=10, min_calls=4, failure_rate=0.5)
+    for _ in range(3):
+        breaker.record(True, 0.1)
+        breaker.record(False, 0.1)
+        breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker("host", min_calls=2, failure_rate=0.5, slow_call=1.0)
+    breaker.record(True, 2.0)
+    breaker.record(True, 2.0)
+    assert breaker.state == OPEN
+
+
+def test_single_probe_after_the_open_period():
+    breaker = CircuitBreaker("host", min_calls=1, failure_rate=0.5, open_seconds=0)
+    failing(breaker, 1)
+    assert not breaker.is_open()
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # only one probe at a time
+    assert breaker.is_open()
+    assert not breaker.allow()
+
+
+def test_probe_success_closes_and_failure_reopens():
+    breaker = CircuitBreaker("host", min_calls=1, failure_rate=0.5, open_seconds=0)
+    failing(breaker, 1)
+    breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+
+    failing(breaker, 1)
+    breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+
+
+def test_cancelled_probe_releases_the_slot():
+    breaker = CircuitBreaker("host", min_calls=1, failure_rate=0.5, open_seconds=0)
+    failing(breaker, 1)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
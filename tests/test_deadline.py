@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from src.api_handler.constants import DEADLINE_RETRY_MARGIN
+from src.api_handler.deadline import (Deadline, DeadlineExceeded, current_deadline,
+                                      deadline_from_config, request_timeout, stop_at_deadline,
+                                      use_deadline, wait_within_deadline)
+
+
+def test_remaining_and_expired():
+    deadline = Deadline(10)
+    assert 9 < deadline.remaining() <= 10
+    assert not deadline.expired()
+    assert deadline.expired(margin=10)
+    assert Deadline(-1).remaining() == 0.0
+    assert Deadline(-1).expired()
+
+
+def test_timeout_is_capped_and_raises_once_passed():
+    assert Deadline(10).timeout(cap=2) == 2
+    assert 9 < Deadline(10).timeout() <= 10
+    with pytest.raises(DeadlineExceeded):
+        Deadline(-1).timeout(cap=2)
+
+
+def test_deadline_from_config():
+    deadline = Deadline(10)
+    assert deadline_from_config({"configurable": {"deadline": deadline}}) is deadline
+    assert deadline_from_config({"configurable": {}}) is None
+    assert deadline_from_config(None) is None
+
+
+def test_use_deadline_nests_and_resets():
+    outer, inner = Deadline(10), Deadline(5)
+    assert current_deadline() is None
+    with use_deadline(outer):
+        with use_deadline(inner):
+            assert current_deadline() is inner
+        assert current_deadline() is outer
+    assert current_deadline() is None
+
+
+def test_use_deadline_reaches_spawned_tasks():
+    async def current() -> Deadline | None:
+        await asyncio.sleep(0)
+        return current_deadline()
+
+    async def run():
+        deadline = Deadline(10)
+        with use_deadline(deadline):
+            task = asyncio.create_task(current())
+        # the block has exited by the time the task reads the context
+        return deadline, await task
+
+    deadline, seen = asyncio.run(run())
+    assert seen is deadline
+
+
+def test_request_timeout():
+    assert request_timeout(10.0) == 10.0
+    with use_deadline(Deadline(2)):
+        assert request_timeout(10.0) <= 2
+    with use_deadline(Deadline(-1)), pytest.raises(DeadlineExceeded):
+        request_timeout(10.0)
+
+
+def test_retry_hooks_respect_the_margin():
+    wait = wait_within_deadline(lambda retry_state: 30.0)
+    assert not stop_at_deadline(None)
+    assert wait(None) == 30.0
+    with use_deadline(Deadline(DEADLINE_RETRY_MARGIN + 3)):
+        assert not stop_at_deadline(None)
+        assert 2 < wait(None) <= 3
+    with use_deadline(Deadline(DEADLINE_RETRY_MARGIN - 1)):
+        assert stop_at_deadline(None)
+        assert wait(None) == 0.0
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from src.agent.executor import AdaptiveLimiter, adaptive_execute
+from src.api_handler.deadline import Deadline, DeadlineExceeded
+
+
+async def sleep_then_return(value: int, delay: float) -> int:
+    await asyncio.sleep(delay)
+    return value
+
+
+def test_results_keep_task_order():
+    # later tasks finish first
+    delays = [0.05, 0.04, 0.03, 0.02, 0.01, 0.0]
+    tasks = [sleep_then_return(i, d) for i, d in enumerate(delays)]
+    results, timings = asyncio.run(adaptive_execute(tasks, AdaptiveLimiter(initial=4)))
+    assert results == list(range(len(delays)))
+    assert [t.index for t in timings] == list(range(len(delays)))
+    assert all(t.queue_wait >= 0 and t.service_time >= 0 for t in timings)
+
+
+def test_deadline_drops_tasks_that_run_out_of_time():
+    async def run():
+        deadline = Deadline(0.05)
+
+        async def task(i: int) -> int:
+            if i % 2:
+                await asyncio.sleep(0.1)
+                raise DeadlineExceeded()
+            return i
+
+        return await adaptive_execute(
+            [task(i) for i in range(6)], AdaptiveLimiter(initial=8), deadline
+        )
+
+    results, timings = asyncio.run(run())
+    assert results == [0, 2, 4]
+    assert len(timings) == 6
+
+
+def test_tasks_not_started_before_the_deadline_are_skipped():
+    async def run():
+        deadline = Deadline(0.05)
+        tasks = [sleep_then_return(i, 0.1) for i in range(4)]
+        return await adaptive_execute(tasks, AdaptiveLimiter(initial=1, max_limit=1), deadline)
+
+    results, timings = asyncio.run(run())
+    # the first task holds the only slot past the deadline, the rest never start
+    assert results == [0]
+    assert [t.index for t in timings] == [0]
+
+
+def test_other_errors_are_raised():
+    async def fail() -> int:
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(adaptive_execute([fail(), sleep_then_return(1, 0.0)], AdaptiveLimiter()))
@@ -0,0 +1,65 @@
+import pytest
+
+from src.api_handler.nutrition_db import NutritionDatabase
+
+
+@pytest.fixture
+def db():
+    database = NutritionDatabase(":memory:")
+    database.import_rows([
+        ("Chicken Breast", 165.0, None, None),
+        ("Chicken Breast Fillets", 150.0, "Brand", "https://example.com/fillets"),
+        ("Chicken Stock", 10.0, None, None),
+        ("Duck Breast", 200.0, None, None),
+        ("Basmati Rice", 350.0, None, None),
+        ("Olive Oil", 884.0, None, None),
+        ("Extra Virgin Olive Oil", 880.0, None, None),
+    ])
+    yield database
+    database.close()
+
+
+def test_import_keeps_first_row_per_name(db):
+    rows = [("chicken breasts", 999.0, None, None), ("Lentils", 116.0, None, None)]
+    assert db.import_rows(rows) == 1
+    assert db.match("Chicken Breast")["calories_per_100g"] == 165.0
+    assert len(db) == 8
+
+
+def test_exact_canonical_name(db):
+    assert db.match("Chicken Breasts") == {
+        "calories_per_100g": 165.0, "product_name": "Chicken Breast", "brands": None, "url": None,
+    }
+
+
+def test_fuzzy_match_prefers_most_shared_tokens(db):
+    assert db.match("boneless chicken breast")["product_name"] == "Chicken Breast"
+    assert db.match("olive oil spray")["product_name"] == "Olive Oil"
+
+
+def test_score_at_min_score_matches(db):
+    # one of two tokens shared: Jaccard 1/2, exactly the default min_score
+    assert db.match("Rice")["product_name"] == "Basmati Rice"
+
+
+def test_below_min_score_is_no_match(db):
+    assert db.match("chicken liver pate") is None
+    assert db.match("Saffron") is None
+    assert db.match("") is None
+
+
+def test_match_many(db):
+    found = db.match_many(["Olive Oil", "Saffron"])
+    assert found["Olive Oil"]["calories_per_100g"] == 884.0
+    assert found["Saffron"] is None
+
+
+def test_truncated_postings_still_count_shared_tokens():
+    db = NutritionDatabase(":memory:", max_candidates=2)
+    db.import_rows([
+        (f"Chicken {dish}", 150.0, None, None) for dish in ("Pie", "Curry", "Wings", "Kiev")
+    ])
+    db.import_rows([("Chicken Soup", 40.0, None, None)])
+    # "chicken" lists only Pie and Curry; Soup is found through "soup" and probed
+    assert db.match("creamy chicken soup")["product_name"] == "Chicken Soup"
+    db.close()
@@ -0,0 +1,84 @@
+from src.agent.query_cache import QueryResultCache, jaccard, query_tokens
+from src.agent.schemas.structured_output import UserRecipeQuery
+from src.api_handler.datamodels import IngredientRequirement, Recipe
+
+
+def make_recipe(recipe_id: str, *ingredients: str) -> Recipe:
+    return Recipe(
+        id=recipe_id,
+        title=recipe_id,
+        ingredients=[IngredientRequirement(name=i) for i in ingredients],
+    )
+
+
+CHICKEN = make_recipe("chicken", "Chicken Thighs", "Rice")
+RISOTTO = make_recipe("risotto", "Rice", "Butter", "Parmesan")
+SALAD = make_recipe("salad", "Lettuce", "Tomatoes")
+
+
+def cache_with(*restrictions: str, allergies: tuple[str, ...] = ()) -> QueryResultCache:
+    cache = QueryResultCache()
+    query = UserRecipeQuery(
+        query="quick dinner", preferences=["rice"], restrictions=list(restrictions)
+    )
+    cache.store(query, [CHICKEN, RISOTTO, SALAD], allergies)
+    return cache
+
+
+def test_query_tokens_ignore_order_plurals_and_filler():
+    a = UserRecipeQuery(query="quick chicken dinner")
+    b = UserRecipeQuery(query="chicken for dinners, quick please")
+    assert query_tokens(a) == query_tokens(b)
+    assert jaccard(query_tokens(a), query_tokens(b)) == 1.0
+
+
+def test_similar_query_hits():
+    cache = cache_with()
+    query = UserRecipeQuery(query="dinner quick", preferences=["rice"])
+    assert [r.id for r in cache.lookup(query)] == ["chicken", "risotto", "salad"]
+
+
+def test_dissimilar_query_misses():
+    cache = cache_with()
+    assert cache.lookup(UserRecipeQuery(query="chocolate cake")) is None
+
+
+def test_hit_is_refiltered_by_current_restrictions():
+    cache = cache_with()
+    query = UserRecipeQuery(query="quick dinner", preferences=["rice"], restrictions=["vegetarian"])
+    assert [r.id for r in cache.lookup(query)] == ["risotto", "salad"]
+
+
+def test_hit_is_refiltered_by_current_allergies():
+    cache = cache_with()
+    query = UserRecipeQuery(query="quick dinner", preferences=["rice"])
+    assert [r.id for r in cache.lookup(query, allergies=["dairy"])] == ["chicken", "salad"]
+
+
+def test_unresolved_restriction_needs_a_search_that_judged_it():
+    query = UserRecipeQuery(query="quick dinner", preferences=["rice"], restrictions=["low sodium"])
+    assert cache_with().lookup(query) is None
+    assert cache_with("low sodium").lookup(query) is not None
+
+
+def test_miss_when_every_recipe_is_filtered_out():
+    cache = QueryResultCache()
+    query = UserRecipeQuery(query="quick dinner")
+    cache.store(query, [CHICKEN])
+    assert cache.lookup(query.model_copy(update={"restrictions": ["vegetarian"]})) is None
+
+
+def test_expired_entries_are_dropped():
+    cache = QueryResultCache(ttl=-1)
+    query = UserRecipeQuery(query="quick dinner")
+    cache.store(query, [SALAD])
+    assert cache.lookup(query) is None
+    assert len(cache) == 0
+
+
+def test_lru_bound():
+    cache = QueryResultCache(max_entries=2)
+    for text in ("pasta bake", "fish curry", "lamb stew"):
+        cache.store(UserRecipeQuery(query=text), [SALAD])
+    assert len(cache) == 2
+    assert cache.lookup(UserRecipeQuery(query="pasta bake")) is None
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from src.api_handler.rate_limit import TokenBucket
+
+
+def acquire_times(bucket: TokenBucket, count: int) -> list[float]:
+    async def run():
+        start = time.monotonic()
+        times = []
+
+        async def one():
+            await bucket.acquire()
+            times.append(time.monotonic() - start)
+
+        await asyncio.gather(*(one() for _ in range(count)))
+        return times
+
+    return asyncio.run(run())
+
+
+def test_burst_is_immediate():
+    times = acquire_times(TokenBucket(rate=1.0, capacity=3), 3)
+    assert max(times) < 0.05
+
+
+def test_requests_past_the_burst_wait_for_the_rate():
+    times = acquire_times(TokenBucket(rate=20.0, capacity=2), 6)
+    # 2 immediately, then one every 50 ms
+    assert times[-1] >= 4 / 20.0 - 0.01
+    assert times[-1] < 4 / 20.0 + 0.1
+
+
+def test_tokens_refill_up_to_capacity():
+    async def run():
+        bucket = TokenBucket(rate=10.0, capacity=2)
+        await bucket.acquire()
+        await bucket.acquire()
+        # five tokens' worth of time passes, but only two fit in the bucket
+        await asyncio.sleep(0.5)
+        start = time.monotonic()
+        times = []
+        for _ in range(3):
+            await bucket.acquire()
+            times.append(time.monotonic() - start)
+        return times
+
+    times = asyncio.run(run())
+    assert times[1] < 0.05
+    assert times[2] >= 0.09
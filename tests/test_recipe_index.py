@@ -0,0 +1,80 @@
+from src.api_handler.datamodels import IngredientRequirement, Recipe
+from src.api_handler.recipe_index import RecipeIndex
+
+
+def make_recipe(recipe_id: str, *ingredients: str) -> Recipe:
+    return Recipe(
+        id=recipe_id,
+        title=recipe_id,
+        ingredients=[IngredientRequirement(name=i) for i in ingredients],
+    )
+
+
+def test_term_tokens_must_share_one_line():
+    index = RecipeIndex()
+    recipe = make_recipe("1", "Chicken Stock", "Duck Breast")
+    assert index.mentions(recipe, ["chicken breast", "chicken", "breast"]) == [False, True, True]
+
+
+def test_plural_spellings_match_the_singular_key():
+    index = RecipeIndex()
+    recipe = make_recipe("1", "Tomatoes", "Eggs")
+    assert index.mentions(recipe, ["tomato", "egg"]) == [True, True]
+
+
+def test_unknown_terms_do_not_grow_the_token_table():
+    index = RecipeIndex()
+    index.mentions(make_recipe("1", "Rice"), ["saffron", "basmati rice"])
+    assert index.token_count == 1
+
+
+def test_changed_ingredients_are_reindexed():
+    index = RecipeIndex()
+    assert index.mentions(make_recipe("1", "Rice"), ["rice"]) == [True]
+    assert index.mentions(make_recipe("1", "Pasta"), ["rice"]) == [False]
+
+
+def test_violations_skip_exempt_lines():
+    index = RecipeIndex()
+    recipe = make_recipe("1", "Coconut Milk", "Rice")
+    assert index.violations(recipe, ["milk"], {"milk": ["coconut milk"]}) == []
+    recipe = make_recipe("2", "Coconut Milk", "Milk")
+    assert index.violations(recipe, ["milk"], {"milk": ["coconut milk"]}) == ["milk"]
+
+
+def test_rank_orders_by_anchor_then_matches_then_size():
+    index = RecipeIndex()
+    both = make_recipe("both", "Chicken", "Rice", "Salt")
+    both_small = make_recipe("both_small", "Chicken", "Rice")
+    anchor_only = make_recipe("anchor_only", "Chicken")
+    no_anchor = make_recipe("no_anchor", "Rice")
+    excluded = make_recipe("excluded", "Chicken", "Rice", "Peanuts")
+    ranked = index.rank(
+        [no_anchor, anchor_only, excluded, both, both_small], ["chicken", "rice"], ["peanut"]
+    )
+    assert [r.id for r in ranked] == ["both_small", "both", "anchor_only", "no_anchor"]
+
+
+def test_lru_evicts_oldest_recipes():
+    index = RecipeIndex(max_recipes=2)
+    for recipe_id in ("1", "2", "3"):
+        index.add(recipe_id, ["Rice"])
+    assert len(index) == 2
+    assert "1" not in index._entries
+
+
+def test_token_table_is_compacted_after_eviction():
+    index = RecipeIndex(max_recipes=2, max_tokens=8)
+    for i in range(50):
+        index.add(str(i), [f"ingredient{i}", "Rice"])
+    # only tokens of the two live recipes survive, give or take one compaction period
+    assert index.token_count <= 8 + 1
+    assert index.mentions(make_recipe("49", "ingredient49", "Rice"), ["rice"]) == [True]
+    assert index.term_mask("ingredient0") == 0
+
+
+def test_add_record_indexes_stored_records():
+    index = RecipeIndex()
+    index.add_record(make_recipe("1", "Lamb Mince").model_dump())
+    assert len(index) == 1
+    assert index.term_mask("lamb mince") != 0
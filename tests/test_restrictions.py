@@ -0,0 +1,54 @@
+import pytest
+
+from src.api_handler.datamodels import IngredientRequirement, Recipe
+from src.api_handler.restrictions import filter_recipes, resolve_restrictions, violations
+
+
+def make_recipe(*ingredients: str) -> Recipe:
+    return Recipe(
+        id="1", title="recipe", ingredients=[IngredientRequirement(name=i) for i in ingredients]
+    )
+
+
+@pytest.mark.parametrize(
+    "restriction, ingredient",
+    [
+        ("vegetarian", "Kidney Beans"),
+        ("vegetarian", "Goats Cheese"),
+        ("vegetarian", "Beef Tomatoes"),
+        ("halal", "Red Wine Vinegar"),
+        ("halal", "Cider Vinegar"),
+        ("tree nut allergy", "Water Chestnuts"),
+        ("vegan", "Coconut Milk"),
+        ("dairy", "Peanut Butter"),
+    ],
+)
+def test_exempt_ingredients_are_kept(restriction, ingredient):
+    terms, _ = resolve_restrictions([restriction])
+    recipe = make_recipe(ingredient, "Salt")
+    assert violations(recipe, terms) == []
+
+
+@pytest.mark.parametrize(
+    "restriction, ingredient",
+    [
+        ("vegetarian", "Lamb Kidneys"),
+        ("vegetarian", "Beef Brisket"),
+        ("vegan", "Goats Cheese"),
+        ("halal", "Red Wine"),
+        ("halal", "Cider"),
+        ("tree nut allergy", "Chestnuts"),
+        ("no shellfish", "Shrimp"),
+    ],
+)
+def test_violating_ingredients_are_dropped(restriction, ingredient):
+    terms, _ = resolve_restrictions([restriction])
+    recipe = make_recipe(ingredient, "Salt")
+    assert violations(recipe, terms)
+    assert filter_recipes([recipe], terms) == []
+
+
+def test_unknown_restrictions_are_left_unresolved():
+    terms, unresolved = resolve_restrictions(["gluten-free", "low sodium"])
+    assert terms
+    assert unresolved == ["low sodium"]